@@ -0,0 +1,89 @@
+import tracemalloc
+from threading import Lock
+
+# кол-во идущих замеров: трассировка выключается, только когда
+# закончился последний из них
+_active_amount = 0
+# трассировку запустил PeakMemory (а не код снаружи)
+_owns_tracing = False
+_lock = Lock()
+
+
+# author: Pavel
+class PeakMemory:
+    """
+    Замер пиковой памяти, выделенной за время обработки фотографии
+    Учитываются массивы numpy (в т.ч. результаты функций OpenCV) и объекты
+    python, временные буферы внутри OpenCV не учитываются
+    Трассировка памяти замедляет все потоки процесса, поэтому замер
+    включается только для отладки. Замеры могут идти в нескольких потоках
+    сразу, но тогда пик считается по всему процессу
+    Использование:
+        with PeakMemory() as memory:
+            ...
+        print(memory.peak)
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        :param enabled: false - замер не проводится (peak остается 0)
+        """
+
+        self.enabled = enabled
+        self.peak = 0  # пик в байтах относительно начала замера
+        self._running = False  # замер идет
+        self._base = 0  # память, выделенная до начала замера
+
+    def start(self):
+        """
+        Начало замера
+        Если трассировка уже запущена снаружи, она не перезапускается,
+        а сбрасывается только ее пик (до Python 3.9 сбросить его нельзя,
+        и в пик может попасть память, выделенная до начала замера)
+        """
+
+        global _active_amount, _owns_tracing
+
+        if not self.enabled or self._running:
+            return
+        with _lock:
+            if _active_amount == 0:
+                _owns_tracing = not tracemalloc.is_tracing()
+                if _owns_tracing:
+                    tracemalloc.start()
+                elif hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+            _active_amount += 1
+            self._running = True
+            self._base = tracemalloc.get_traced_memory()[0]
+
+    def stop(self) -> int:
+        """
+        Конец замера
+        :return: пиковая память в байтах
+        """
+
+        global _active_amount
+
+        if not self._running:
+            return self.peak
+        with _lock:
+            if tracemalloc.is_tracing():
+                self.peak = max(tracemalloc.get_traced_memory()[1] -
+                                self._base, 0)
+            _active_amount -= 1
+            if _active_amount == 0 and _owns_tracing:
+                tracemalloc.stop()
+            self._running = False
+        return self.peak
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def __str__(self) -> str:
+        return f'{self.peak / 2 ** 20:.1f} МБ'
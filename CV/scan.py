@@ -10,27 +10,61 @@ from CV.transform import four_point_transform
 
 # размер изображений для тренировки и предсказаний модели
 IMG_SIZE = 64
+# размер доски, при котором каждая клетка имеет размер IMG_SIZE
+BOARD_SIZE = 15 * IMG_SIZE
+# наибольшая сторона доски после выпрямления перспективы:
+# с запасом на поля, которые срезает cut_by_internal_contour
+WARP_SIZE = round(BOARD_SIZE * 1.1)
+
+# режимы перевода в ЧБ (gray_to_binary)
+BINARIZATION_ACCURATE = 'accurate'  # подавление шумов TV-фильтром
+BINARIZATION_FAST = 'fast'  # фильтрация и порогование в uint8
+# фильтры быстрого режима
+SMOOTHING_BILATERAL = 'bilateral'
+SMOOTHING_MEDIAN = 'median'
+# порогование быстрого режима
+THRESHOLD_ADAPTIVE = 'adaptive'  # порог по среднему в окне размером с клетку
+THRESHOLD_GLOBAL = 'global'  # один порог isodata, как в точном режиме
+# насколько пиксель должен быть ярче среднего по окну, чтобы стать белым:
+# белыми остаются только буквы, а не ровный фон фишек и клеток
+ADAPTIVE_THRESHOLD_OFFSET = 50
+
+# доля белых пикселей в центре клетки, ниже которой клетка считается пустой:
+# у букв (в т.ч. *) она не меньше ~0.15, у пустых клеток с шумом
+# и краями соседних квадратов - не больше ~0.01
+OCCUPANCY_THRESHOLD = 0.05
+# отступ центра клетки от краев (края - в шумах и сетке доски)
+OCCUPANCY_MARGIN = IMG_SIZE // 5
+
+# коррекция контраста быстрого режима: adjust_sigmoid для всех 256 яркостей
+_SIGMOID_TABLE = img_as_ubyte(adjust_sigmoid(np.arange(256) / 255,
+                                             cutoff=0.4))
 
 
 # authors: Pavel, Mikhail, Sergei, Matvey
-def cut_by_external_contour(img: np.ndarray) -> np.ndarray:
+def cut_by_external_contour(img: np.ndarray,
+                            max_size: int = WARP_SIZE) -> np.ndarray:
     """
     Обрезает внешний контур объекта на изображении
     Подходит для игральной доски
+    Исходное изображение не копируется и не меняется: контур ищется
+    на уменьшенной копии, а перспектива выпрямляется сразу в итоговый
+    размер, не больше max_size
     :param img: Изображение на вход
+    :param max_size: наибольшая сторона результата, None - без ограничения
     :return: Обрезанное изображение
     """
 
     try:
         ratio = img.shape[0] / 750.0
-        orig = img.copy()
+        orig = img
         img = resize_img(img, height=750)
 
         # изображение в оттенках серого
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
         # размытие по Гауссу, оптимальные параметры: (5, 5)
-        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=gray)
 
         # изображение с границами
         edged = cv2.Canny(gray, 75, 150)
@@ -39,10 +73,10 @@ def cut_by_external_contour(img: np.ndarray) -> np.ndarray:
         # оптимальные параметры: (7, 7)
         # затем само морфологическое преобразование (закрытие контуров)
         kernel = cv2.getStructuringElement(cv2.MORPH_CROSS, (7, 7))
-        edged = cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel)
+        cv2.morphologyEx(edged, cv2.MORPH_CLOSE, kernel, dst=edged)
 
-        # массив всех контуров
-        contours, _ = cv2.findContours(edged.copy(), cv2.RETR_LIST,
+        # массив всех контуров (edged больше не нужен - копия не делается)
+        contours, _ = cv2.findContours(edged, cv2.RETR_LIST,
                                        cv2.CHAIN_APPROX_SIMPLE)
 
         # сортировка контуров по убыванию площади
@@ -64,7 +98,8 @@ def cut_by_external_contour(img: np.ndarray) -> np.ndarray:
                 screen_cnt = approx
                 break
                 # меняем перспективу на вид сверху
-        cropped = four_point_transform(orig, screen_cnt.reshape(4, 2) * ratio)
+        cropped = four_point_transform(orig, screen_cnt.reshape(4, 2) * ratio,
+                                       max_size)
 
     except AttributeError:
         raise CutException
@@ -129,6 +164,24 @@ def resize_img(img: np.ndarray, height: int, width=None) -> np.ndarray:
     return cv2.resize(img, (width, height))
 
 
+# author: Pavel
+def resize_board(img: np.ndarray, size: int = BOARD_SIZE) -> np.ndarray:
+    """
+    Уменьшает обрезанную доску до размера, который нужен классификатору,
+    чтобы фильтры работали с разрешением модели, а не камеры
+    Доска меньшего размера не увеличивается
+    :param img: обрезанное изображение доски
+    :param size: сторона доски после уменьшения
+    :return: уменьшенное изображение (или исходное)
+    """
+
+    (h, w) = img.shape[:2]
+    if h <= size and w <= size:
+        return img
+    return cv2.resize(img, (min(w, size), min(h, size)),
+                      interpolation=cv2.INTER_AREA)
+
+
 # authors: Mikhail, Matvey
 def get_coordinates_to_cut(img: np.ndarray) -> ([int], [int], int, int):
     """
@@ -188,16 +241,17 @@ def cut_board_on_cells(img: np.ndarray) -> [np.ndarray]:
     # получение координат и размеров изображения
     x, y, h, w = get_coordinates_to_cut(img)
 
-    # заполнение массива
-    squares = []
+    # заполнение массива: каждая клетка масштабируется сразу на свое место
+    squares = np.empty((15, 15, IMG_SIZE, IMG_SIZE) + img.shape[2:],
+                       dtype=np.uint8)
+    img = img_as_ubyte(img)
     for n in range(1, 16):
-        squares.append([])
         for m in range(1, 16):
             cropped = img[y[n - 1]:y[n], x[m - 1]:x[m]]
-            cropped = resize_img(cropped, IMG_SIZE, IMG_SIZE)
-            squares[n - 1].append(cropped)
+            cv2.resize(cropped, (IMG_SIZE, IMG_SIZE),
+                       dst=squares[n - 1, m - 1])
 
-    return np.array(squares, dtype='uint8')
+    return squares
 
 
 # author: Matvey
@@ -227,19 +281,34 @@ def rgb_to_gray(rgb: np.ndarray, coefficients: [float],
     if len(coefficients) != 3:
         raise ValueError(
             f"Ожидается 3 коэффициента, получено {len(coefficients)}")
-    coeffs = np.array(coefficients, dtype=rgb.dtype)
+    # взвешенная сумма каналов считается за один проход без float64 копии
+    coeffs = np.array([coefficients], dtype=np.float32)
 
-    return rgb @ coeffs
+    return cv2.transform(rgb, coeffs)
 
 
 # authors: Matvey, Mikhail
-def gray_to_binary(image_gray: np.ndarray) -> np.ndarray:
+def gray_to_binary(image_gray: np.ndarray,
+                   mode: str = BINARIZATION_ACCURATE,
+                   smoothing: str = SMOOTHING_BILATERAL,
+                   scale: float = 1.0,
+                   threshold: str = THRESHOLD_ADAPTIVE) -> np.ndarray:
     """
     Переводит изображение из оттенокв серого в черно-белое.
     :param image_gray: изображение в оттенках серого
+    :param mode: BINARIZATION_ACCURATE - подавление шумов TV-фильтром,
+    BINARIZATION_FAST - быстрый путь (см. fast_gray_to_binary)
+    :param smoothing: фильтр быстрого пути
+    :param scale: масштаб, в котором фильтруется изображение в быстром пути
+    :param threshold: порогование быстрого пути
     :return: изображение в ЧБ формате
     """
 
+    if mode == BINARIZATION_FAST:
+        return fast_gray_to_binary(image_gray, smoothing, scale, threshold)
+    if mode != BINARIZATION_ACCURATE:
+        raise ValueError(f'Неизвестный режим перевода в ЧБ {mode}')
+
     img_denoised = denoise_tv_bregman(image_gray, weight=33)  # Подавление шумов
     # img_denoised = denoise_nl_means(image_gray)
 
@@ -250,6 +319,64 @@ def gray_to_binary(image_gray: np.ndarray) -> np.ndarray:
     return img_bin
 
 
+# author: Pavel
+def fast_gray_to_binary(image_gray: np.ndarray,
+                        smoothing: str = SMOOTHING_BILATERAL,
+                        scale: float = 1.0,
+                        threshold: str = THRESHOLD_ADAPTIVE) -> np.ndarray:
+    """
+    Быстрый перевод в ЧБ целиком в uint8
+    Вместо denoise_tv_bregman - билатеральный или медианный фильтр,
+    коррекция контраста - та же сигмоида, но через таблицу на 256 значений.
+    Порог по умолчанию адаптивный: среднее по окну размером с клетку доски
+    плюс ADAPTIVE_THRESHOLD_OFFSET, поэтому неравномерное освещение
+    фотографии с телефона (тень, блик с одной стороны) не съедает буквы.
+    THRESHOLD_GLOBAL - тот же isodata, что в точном режиме, но по гистограмме
+    :param image_gray: изображение в оттенках серого
+    :param smoothing: SMOOTHING_BILATERAL или SMOOTHING_MEDIAN
+    :param scale: масштаб, в котором фильтруется изображение (<1 - быстрее
+    на больших фотографиях, результат возвращается в исходном размере)
+    :param threshold: THRESHOLD_ADAPTIVE или THRESHOLD_GLOBAL
+    :return: изображение в ЧБ формате
+    """
+
+    image_gray = img_as_ubyte(image_gray)
+    (h, w) = image_gray.shape[:2]
+
+    img = image_gray
+    if scale != 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale,
+                         interpolation=cv2.INTER_AREA)
+
+    # Подавление шумов
+    if smoothing == SMOOTHING_BILATERAL:
+        img = cv2.bilateralFilter(img, 5, 50, 5)
+    elif smoothing == SMOOTHING_MEDIAN:
+        img = cv2.medianBlur(img, 3)
+    else:
+        raise ValueError(f'Неизвестный фильтр {smoothing}')
+
+    if scale != 1.0:
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_LINEAR)
+
+    # дальше все шаги пишут в один и тот же буфер
+    cv2.LUT(img, _SIGMOID_TABLE, dst=img)  # Коррекция контраста
+    # Порогование
+    if threshold == THRESHOLD_ADAPTIVE:
+        # окно - одна клетка доски (нечетного размера)
+        block_size = max(w // 15, 3) | 1
+        cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                              cv2.THRESH_BINARY, block_size,
+                              -ADAPTIVE_THRESHOLD_OFFSET, dst=img)
+    elif threshold == THRESHOLD_GLOBAL:
+        hist = cv2.calcHist([img], [0], None, [256], [0, 256]).ravel()
+        value = threshold_isodata(hist=hist.astype(np.int64))
+        cv2.threshold(img, int(value), 255, cv2.THRESH_BINARY, dst=img)
+    else:
+        raise ValueError(f'Неизвестное порогование {threshold}')
+    return img
+
+
 # authors: Sergei, Mikhail
 def crop_letter(img_bin: np.ndarray) -> np.ndarray:
     """
@@ -279,3 +406,102 @@ def crop_letter(img_bin: np.ndarray) -> np.ndarray:
             break
 
     return resize_img(cropped, IMG_SIZE, IMG_SIZE)
+
+
+# author: Pavel
+def get_letters_boxes(squares: np.ndarray) -> (np.ndarray, np.ndarray,
+                                                np.ndarray):
+    """
+    Квадраты, по которым crop_letter обрезает букву, сразу для всех клеток
+    Клетки складываются в одно изображение-мозаику с нулевыми
+    промежутками в 1 пиксель, чтобы контуры соседних клеток не сливались,
+    и контуры ищутся одним вызовом на всю мозаику.
+    В каждой клетке берется первый достаточно большой контур -
+    тот же, что выбрал бы crop_letter
+    :param squares: клетки доски, массив (строки, столбцы, IMG_SIZE, IMG_SIZE)
+    :return: верхние и левые края квадратов, стороны квадратов
+    (по одному значению на клетку, клетки построчно)
+    """
+
+    rows, cols, size = squares.shape[:3]
+    step = size + 1  # клетка с промежутком
+
+    mosaic = np.zeros((rows, step, cols, step), dtype=np.uint8)
+    mosaic[:, :size, :, :size] = squares.transpose(0, 2, 1, 3)
+    mosaic = mosaic.reshape(rows * step, cols * step)
+    contours, _ = cv2.findContours(mosaic, cv2.RETR_EXTERNAL,
+                                   cv2.CHAIN_APPROX_SIMPLE)
+
+    # без буквы клетка остается целиком
+    tops = np.zeros(rows * cols, dtype=np.int64)
+    lefts = np.zeros(rows * cols, dtype=np.int64)
+    sides = np.full(rows * cols, size, dtype=np.int64)
+    if not contours:
+        return tops, lefts, sides
+
+    rects = np.array([cv2.boundingRect(c) for c in contours],
+                     dtype=np.int64)
+    cells = (rects[:, 1] // step) * cols + rects[:, 0] // step
+    # большие контуры в обратном порядке: при присваивании
+    # в клетке остается первый из них
+    big = np.flatnonzero(rects[:, 2] * rects[:, 3] >
+                         np.square(size) / 9.3)[::-1]
+    chosen = np.full(rows * cols, -1)
+    chosen[cells[big]] = big
+    found = chosen >= 0
+
+    # те же границы, что в crop_letter: по низу и левому краю буквы,
+    # квадрат прижат к нижнему краю
+    rects = rects[chosen[found]]
+    x = rects[:, 0] % step
+    bottom = rects[:, 1] % step + rects[:, 3]
+    sides[found] = np.minimum(bottom, size - x)
+    tops[found] = bottom - sides[found]
+    lefts[found] = x
+    return tops, lefts, sides
+
+
+# author: Pavel
+def crop_letters(squares: np.ndarray) -> np.ndarray:
+    """
+    Вырезает буквы сразу из всех клеток (то же, что crop_letter
+    для каждой клетки) и собирает из них матрицу признаков
+    для классификатора
+    :param squares: клетки доски, массив (строки, столбцы, IMG_SIZE, IMG_SIZE)
+    :return: массив uint8 (кол-во клеток, IMG_SIZE * IMG_SIZE),
+    строка - развернутое изображение обрезанной клетки
+    """
+
+    squares = img_as_ubyte(np.asarray(squares))
+    size = squares.shape[2]
+    tops, lefts, sides = get_letters_boxes(squares)
+    flat_squares = squares.reshape(-1, size, size)
+
+    # каждая буква сразу масштабируется в свою строку матрицы
+    images = np.empty((len(flat_squares), size * size), dtype=np.uint8)
+    for i, (y, x, side) in enumerate(zip(tops.tolist(), lefts.tolist(),
+                                         sides.tolist())):
+        cv2.resize(flat_squares[i, y:y + side, x:x + side], (size, size),
+                   dst=images[i].reshape(size, size))
+    return images
+
+
+# author: Pavel
+def get_occupied_cells(squares: np.ndarray,
+                       threshold: float = OCCUPANCY_THRESHOLD,
+                       margin: int = OCCUPANCY_MARGIN) -> np.ndarray:
+    """
+    Грубая проверка занятости клеток ЧБ доски сразу для всех клеток:
+    доля белых пикселей в центре клетки
+    Пустые клетки можно не обрезать и не классифицировать
+    :param squares: клетки доски, массив (..., IMG_SIZE, IMG_SIZE)
+    :param threshold: наименьшая доля белых пикселей занятой клетки
+    :param margin: отступ центра клетки от краев в пикселях
+    :return: массив bool формы squares.shape[:-2], true - клетка занята
+    """
+
+    squares = np.asarray(squares)
+    centers = squares[..., margin:squares.shape[-2] - margin,
+                      margin:squares.shape[-1] - margin]
+    ink = np.count_nonzero(centers > 127, axis=(-2, -1))
+    return ink >= threshold * centers.shape[-2] * centers.shape[-1]
@@ -28,7 +28,7 @@ def order_points(pts):
 
 
 # open-source code
-def four_point_transform(image, pts):
+def four_point_transform(image, pts, max_size=None):
     # obtain a consistent order of the points and unpack them
     # individually
     rect = order_points(pts)
@@ -48,6 +48,13 @@ def four_point_transform(image, pts):
     height_b = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
     max_height = max(int(height_a), int(height_b))
 
+    # the result is warped straight into the reduced size,
+    # so the full-resolution board is never allocated
+    if max_size is not None and max(max_width, max_height) > max_size:
+        scale = max_size / max(max_width, max_height)
+        max_width = max(int(max_width * scale), 1)
+        max_height = max(int(max_height * scale), 1)
+
     # now that we have the dimensions of the new image, construct
     # the set of destination points to obtain a "birds eye view",
     # (i.e. top-down view) of the image, again specifying points
@@ -0,0 +1,120 @@
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+from sklearn.svm import SVC
+
+from CV.scan import IMG_SIZE
+
+# названия классификаторов (см. make_classifier)
+BACKEND_RANDOM_FOREST = 'random_forest'  # 750 деревьев по пикселям
+BACKEND_PCA_LOGISTIC = 'pca_logistic'  # главные компоненты + лог. регрессия
+BACKEND_PCA_KNN = 'pca_knn'  # главные компоненты + ближайшие соседи
+BACKEND_HOG_SVM = 'hog_svm'  # гистограммы градиентов + SVM
+BACKEND_MLP = 'mlp'  # небольшая нейросеть (один скрытый слой)
+
+# HOG: клетки 8x8 пикселей, 9 направлений, блоки 2x2 клетки с шагом 1
+HOG_CELL_SIZE = 8
+HOG_ORIENTATIONS = 9
+
+
+# author: Pavel
+def get_hog_features(flat_images: np.ndarray) -> np.ndarray:
+    """
+    Признаки HOG (гистограммы направлений градиентов) сразу для всех клеток
+    Используется внутри классификатора BACKEND_HOG_SVM, поэтому
+    классификатор получает те же развернутые клетки, что и остальные
+    :param flat_images: матрица (N, IMG_SIZE * IMG_SIZE)
+    :return: матрица признаков (N, кол-во признаков HOG) float32
+    """
+
+    images = np.asarray(flat_images, dtype=np.float32).reshape(
+        (-1, IMG_SIZE, IMG_SIZE))
+    n = len(images)
+    cells = IMG_SIZE // HOG_CELL_SIZE
+
+    # центральные разности по обеим осям
+    gx = np.zeros_like(images)
+    gy = np.zeros_like(images)
+    gx[:, :, 1:-1] = images[:, :, 2:] - images[:, :, :-2]
+    gy[:, 1:-1, :] = images[:, 2:, :] - images[:, :-2, :]
+    magnitude = np.hypot(gx, gy)
+    # направление без знака: [0, pi)
+    orientation = np.arctan2(gy, gx)
+    orientation[orientation < 0] += np.float32(np.pi)
+    orientation *= np.float32(HOG_ORIENTATIONS / np.pi)
+    bins = np.minimum(orientation.astype(np.intp), HOG_ORIENTATIONS - 1)
+
+    # гистограммы клеток (N, cells, cells, HOG_ORIENTATIONS) одним bincount:
+    # номер корзины пикселя = (изображение, клетка, направление)
+    pixels_cells = (np.arange(IMG_SIZE) // HOG_CELL_SIZE)
+    pixels_cells = pixels_cells[:, np.newaxis] * cells + pixels_cells
+    index = (np.arange(n)[:, np.newaxis, np.newaxis] * cells * cells +
+             pixels_cells) * HOG_ORIENTATIONS + bins
+    histograms = np.bincount(index.ravel(), magnitude.ravel(),
+                             n * cells * cells * HOG_ORIENTATIONS).astype(
+        np.float32).reshape((n, cells, cells, HOG_ORIENTATIONS))
+
+    # блоки 2x2 клетки, нормированные по L2
+    blocks = np.concatenate([histograms[:, :-1, :-1], histograms[:, :-1, 1:],
+                             histograms[:, 1:, :-1], histograms[:, 1:, 1:]],
+                            axis=3)
+    blocks /= np.sqrt((blocks ** 2).sum(axis=3, keepdims=True) + 1e-6)
+    return blocks.reshape((n, -1))
+
+
+# author: Pavel
+def make_classifier(backend: str = BACKEND_RANDOM_FOREST):
+    """
+    Новый (не обученный) классификатор по названию
+    Все классификаторы принимают развернутые клетки
+    (N, IMG_SIZE * IMG_SIZE) uint8 и умеют predict и predict_proba,
+    поэтому дамп любого из них подходит для classify_images
+    :param backend: название классификатора (BACKEND_*)
+    :return: классификатор sklearn
+    """
+
+    if backend not in CLASSIFIER_BACKENDS:
+        raise ValueError(f'Неизвестный классификатор {backend}, доступны: '
+                         f'{", ".join(CLASSIFIER_BACKENDS)}')
+    return CLASSIFIER_BACKENDS[backend]()
+
+
+def _make_random_forest():
+    return RandomForestClassifier(n_estimators=750, random_state=1,
+                                  n_jobs=-1, verbose=True)
+
+
+def _make_pca_logistic():
+    return make_pipeline(StandardScaler(), PCA(n_components=60,
+                                               random_state=1),
+                         LogisticRegression(max_iter=1000))
+
+
+def _make_pca_knn():
+    return make_pipeline(PCA(n_components=40, random_state=1),
+                         KNeighborsClassifier(n_neighbors=3,
+                                              weights='distance'))
+
+
+def _make_hog_svm():
+    return make_pipeline(FunctionTransformer(get_hog_features),
+                         SVC(kernel='rbf', C=10, probability=True,
+                             random_state=1))
+
+
+def _make_mlp():
+    return make_pipeline(StandardScaler(),
+                         MLPClassifier(hidden_layer_sizes=(128,),
+                                       early_stopping=True, random_state=1))
+
+
+CLASSIFIER_BACKENDS = {BACKEND_RANDOM_FOREST: _make_random_forest,
+                       BACKEND_PCA_LOGISTIC: _make_pca_logistic,
+                       BACKEND_PCA_KNN: _make_pca_knn,
+                       BACKEND_HOG_SVM: _make_hog_svm,
+                       BACKEND_MLP: _make_mlp}
@@ -1,12 +1,14 @@
 from pathlib import Path
 
 import numpy as np
-from joblib import load
 # from matplotlib import pyplot as plt
 from skimage import img_as_ubyte
 
-from CV.scan import IMG_SIZE, rgb_to_gray, gray_to_binary, cut_board_on_cells, crop_letter
+from CV.scan import IMG_SIZE, BINARIZATION_ACCURATE, rgb_to_gray, gray_to_binary, cut_board_on_cells, \
+    crop_letters, resize_board, cut_by_external_contour, cut_by_internal_contour, get_occupied_cells
+from CV.exceptions import CutException
 from ML.exceptions import ClfNotFoundException, ScNotFoundException, DimRedNotFoundException
+from ML.model_registry import load_model
 
 
 # plt.rcParams["figure.figsize"] = (40, 40)  # размер графиков
@@ -20,10 +22,13 @@ def classify_images(board: [np.ndarray],
                     probability: bool = False) -> ([[int]], [[float]]):
     """Приводит картинку к серому. Где каждый пиксель представлен
     интенсивностью белого.
-    Загружает дамп обученной модели. И выдает предсказания для каждой клетки.
+    Загружает дамп обученной модели (один раз за время работы процесса,
+    см. ML/model_registry.py). И выдает предсказания для каждой клетки.
+    Подходит дамп любого классификатора из ML/classifiers.py.
 
     :param board: Массив 15х15х3, где каждый пиксель представлен
-    интенсивностями rgb.
+    интенсивностями rgb. Или уже готовая матрица признаков
+    225 x (IMG_SIZE * IMG_SIZE) в формате ubyte (см. CV.scan.crop_letters).
     :param clf_path: путь к дампу с классификатором.
     :param dimred_path: путь к дампу с декомпозером.
     :param sc_path: путь к дампу со шкалировщиком.
@@ -34,51 +39,73 @@ def classify_images(board: [np.ndarray],
     И второй массив таких же размеров, содержащий вероятности.
     """
 
-    try:  # Разворачиваем массив доски в одномерный массив
-        flat_board = np.array(board).reshape(
-            (board.shape[0] * board.shape[1], IMG_SIZE, IMG_SIZE))
-    except ValueError:
-        raise ValueError(f'Нельзя развернуть изображение формы {board.shape}')
+    if board.shape == (225, IMG_SIZE * IMG_SIZE):
+        # Матрица признаков уже собрана
+        flat_images = board
+    else:
+        try:  # Разворачиваем массив доски в одномерный массив
+            flat_board = np.array(board).reshape(
+                (board.shape[0] * board.shape[1], IMG_SIZE, IMG_SIZE))
+        except ValueError:
+            raise ValueError(f'Нельзя развернуть изображение формы '
+                             f'{board.shape}')
+
+        flat_images = np.zeros(shape=(225, IMG_SIZE * IMG_SIZE),
+                               dtype=np.uint8)
+
+        for i in range(len(flat_board)):
+            flat_images[i] = img_as_ubyte(flat_board[i]).ravel()
+            # Переводим в интенсивность белого в формат ubyte.
+            # Разворачиваем массив в IMG_RESOLUTION * IMG_RESOLUTION
+
+    predictions, answer_proba = predict_cells(flat_images, clf_path,
+                                              dimred_path, sc_path,
+                                              probability)
 
-    flat_images = np.zeros(shape=(225, IMG_SIZE * IMG_SIZE), dtype=np.uint8)
+    if probability:
+        return list(np.array(predictions, dtype=np.uint8).reshape(15, 15)), \
+            list(np.array(answer_proba).reshape(15, 15))
 
-    for i in range(len(flat_board)):
-        flat_images[i] = img_as_ubyte(flat_board[i]).ravel()
-        # Переводим в интенсивность белого в формат ubyte.
-        # Разворачиваем массив в IMG_RESOLUTION * IMG_RESOLUTION
+    return list(predictions.reshape(15, 15))
 
-    if not Path(clf_path).exists():
-        raise ClfNotFoundException(f'Не найден дамп классификатора {clf_path}')
-    clf = load(clf_path)  # Загружаем обученный классикатор
+
+# author: Pavel
+def predict_cells(flat_images: np.ndarray,
+                  clf_path: Path,
+                  dimred_path: Path = None,
+                  sc_path: Path = None,
+                  probability: bool = True) -> (np.ndarray, np.ndarray):
+    """
+    Предсказания для любого кол-ва клеток
+    (например, только для занятых, см. CV.scan.get_occupied_cells)
+
+    :param flat_images: матрица признаков (кол-во клеток, IMG_SIZE * IMG_SIZE)
+    :param clf_path: путь к дампу с классификатором.
+    :param dimred_path: путь к дампу с декомпозером.
+    :param sc_path: путь к дампу со шкалировщиком.
+    :param probability: нужно ли считать вероятность.
+    :return: предсказанные категории и их вероятности (None без probability)
+    """
+
+    # Загружаем обученный классикатор
+    clf = load_model(clf_path, ClfNotFoundException,
+                     f'Не найден дамп классификатора {clf_path}')
 
     if dimred_path:
-        if not Path(dimred_path).exists():
-            raise DimRedNotFoundException(f'Не найден дамп декомпозера '
-                                          f'{dimred_path}')
-        dimred = load(dimred_path)
+        dimred = load_model(dimred_path, DimRedNotFoundException,
+                            f'Не найден дамп декомпозера {dimred_path}')
         flat_images = dimred.transform(flat_images)  # Режем слабые признаки
 
     if sc_path:
-        if not Path(sc_path).exists():
-            raise ScNotFoundException(f'Не найден дамп шкалировщика {sc_path}')
-        scaler = load(sc_path)  # Загружаем обученный шкалировщик
+        # Загружаем обученный шкалировщик
+        scaler = load_model(sc_path, ScNotFoundException,
+                            f'Не найден дамп шкалировщика {sc_path}')
         flat_images = scaler.transform(flat_images)  # Шкалируем выборку
 
-    predictions = clf.predict(flat_images)
-
-    if probability:
-        answer_proba = []
-        predictions_proba = clf.predict_proba(flat_images)
-        for i in predictions_proba:
-            answer_proba.append(i.max())
-
-        predictions = np.array(predictions, dtype=np.uint8).reshape(15, 15)
-        for i in range(len(predictions)):
-            predictions[i] = list(predictions[i])
-        return list(np.array(predictions, dtype=np.uint8).reshape(15, 15)), \
-            list(np.array(answer_proba).reshape(15, 15))
-
-    return list(predictions.reshape(15, 15))
+    predictions = np.asarray(clf.predict(flat_images))
+    if not probability:
+        return predictions, None
+    return predictions, clf.predict_proba(flat_images).max(axis=1)
 
 
 # author: Matvey
@@ -111,13 +138,17 @@ def nums_to_letters(predictions: [[int]],
 def image_to_board(img_squared: np.ndarray,
                    clf_path: Path,
                    dimred_path: Path = None,
-                   sc_path: Path = None) -> [[str]]:
+                   sc_path: Path = None,
+                   binarization: str = BINARIZATION_ACCURATE,
+                   skip_empty: bool = True) -> [[str]]:
     """
     Получает обрезанную фотографию доски, применяет к ней:
 
+    * уменьшение до разрешения классификатора (15 * IMG_SIZE)
     * перевод в отттенки серого с подавлением синего цвета
     * перевод в ЧБ + денойз
     * нарезку на клетки
+    * отсев пустых клеток
     * коррекцию положения буквы
     * классификация буквы
 
@@ -125,12 +156,19 @@ def image_to_board(img_squared: np.ndarray,
     :param clf_path: путь до дампа классификатора
     :param dimred_path: путь до дампа декомпозера
     :param sc_path: путь до дампа шкалировщика
+    :param binarization: режим перевода в ЧБ (см. CV.scan.gray_to_binary)
+    :param skip_empty: не классифицировать пустые клетки
+    (см. CV.scan.get_occupied_cells)
     :return: массив букв распознанной позиции с фотографии
     """
+    # Клетки все равно сжимаются до IMG_SIZE - уменьшаем доску сразу,
+    # до перевода в оттенки серого и фильтрации
+    img_squared = resize_board(img_squared)
+
     # Перевод в оттенки серого
     img_gray = rgb_to_gray(img_squared, [1, 0, 0])
 
-    img_bw = gray_to_binary(img_gray)
+    img_bw = gray_to_binary(img_gray, binarization)
     board_squares = img_as_ubyte(cut_board_on_cells(img_bw))
 
     # Для того, чтобы посмотреть графики - расскомментировать:
@@ -140,20 +178,57 @@ def image_to_board(img_squared: np.ndarray,
     # for i in range(len(board_squares)):
     #     for j in range(len(board_squares[0])):
     #         ax1[i, j].imshow(board_squares[i][j])
-    #
-    # fig, ax2 = plt.subplots(nrows=15, ncols=15)
 
-    for i in range(len(board_squares)):
-        for j in range(len(board_squares[0])):
-            board_squares[i][j] = crop_letter(board_squares[i][j])
-            # ax2[i, j].imshow(board_squares[i][j])
+    # Пустые клетки не обрезаются и не классифицируются:
+    # их вероятность 0, и nums_to_letters оставляет их пустыми
+    if skip_empty:
+        occupied = get_occupied_cells(board_squares)
+    else:
+        occupied = np.ones((15, 15), dtype=bool)
+
+    # Коррекция положения буквы сразу во всех занятых клетках,
+    # на выходе - матрица признаков для классификатора
+    flat_images = crop_letters(board_squares[occupied][np.newaxis])
 
     # plt.show()
 
-    predicted_letters, pred_probas = classify_images(board_squares,
-                                                     clf_path=clf_path,
-                                                     dimred_path=dimred_path,
-                                                     sc_path=sc_path,
-                                                     probability=True)
+    predicted_letters = np.zeros((15, 15), dtype=np.uint8)
+    pred_probas = np.zeros((15, 15))
+    if len(flat_images):
+        predictions, probabilities = predict_cells(flat_images,
+                                                   clf_path=clf_path,
+                                                   dimred_path=dimred_path,
+                                                   sc_path=sc_path)
+        predicted_letters[occupied] = predictions
+        pred_probas[occupied] = probabilities
+
+    return nums_to_letters(list(predicted_letters), list(pred_probas))
+
+
+# author: Pavel
+def photo_to_board(img: np.ndarray,
+                   clf_path: Path,
+                   dimred_path: Path = None,
+                   sc_path: Path = None,
+                   binarization: str = BINARIZATION_ACCURATE) -> (np.ndarray, [[str]]):
+    """
+    Весь путь от фотографии до распознанной доски: обрезка по внешнему
+    и внутреннему контуру и image_to_board
+    Ошибка обрезки выбрасывается как CutException
+
+    :param img: фотография доски (uint8)
+    :param clf_path: путь до дампа классификатора
+    :param dimred_path: путь до дампа декомпозера
+    :param sc_path: путь до дампа шкалировщика
+    :param binarization: режим перевода в ЧБ (см. CV.scan.gray_to_binary)
+    :return: обрезанная фотография доски и массив букв
+    """
+
+    try:
+        img_squared = cut_by_internal_contour(cut_by_external_contour(img))
+    except (AttributeError, ValueError) as e:
+        raise CutException(str(e))
 
-    return nums_to_letters(predicted_letters, pred_probas)
+    board = image_to_board(img_squared, clf_path, dimred_path, sc_path,
+                           binarization)
+    return img_squared, board
@@ -0,0 +1,67 @@
+from pathlib import Path
+from threading import Lock
+
+from joblib import load
+
+# загруженные дампы: абсолютный путь -> (время изменения файла, объект)
+_MODELS = {}
+_MODELS_LOCK = Lock()
+
+
+# author: Pavel
+def load_model(path: Path, exception: type = FileNotFoundError,
+               message: str = None):
+    """
+    Загружает дамп модели (классификатора, декомпозера, шкалировщика)
+    один раз за время работы процесса
+    Повторные вызовы возвращают тот же объект, пока файл дампа
+    не изменится - тогда он перечитывается
+    :param path: путь к дампу
+    :param exception: исключение, выбрасываемое если дампа нет
+    :param message: текст исключения
+    :return: загруженный объект
+    """
+
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise exception(message or f'Не найден дамп {path}')
+
+    key = path.resolve()
+    with _MODELS_LOCK:
+        cached = _MODELS.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        model = load(path)
+        _MODELS[key] = (mtime, model)
+        return model
+
+
+# author: Pavel
+def warm_up_models(*paths: Path) -> int:
+    """
+    Заранее загружает дампы (например, при старте приложения),
+    чтобы первое распознавание не ждало чтения модели
+    Отсутствующие дампы пропускаются - ошибка будет выдана
+    при распознавании
+    :param paths: пути к дампам, None пропускаются
+    :return: кол-во загруженных дампов
+    """
+
+    loaded = 0
+    for path in paths:
+        if path is not None and Path(path).exists():
+            load_model(path)
+            loaded += 1
+    return loaded
+
+
+# author: Pavel
+def clear_models():
+    """
+    Выгружает все загруженные дампы
+    """
+
+    with _MODELS_LOCK:
+        _MODELS.clear()
@@ -0,0 +1,216 @@
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+import cv2
+import numpy as np
+from joblib import dump, load
+
+# ограничение кэша по умолчанию (в основном - обрезанные фотографии доски)
+CACHE_MAX_BYTES = 64 * 2 ** 20
+# миниатюра доски для сравнения похожих фотографий: 3x3 пикселя на клетку
+THUMBNAIL_SIZE = 15 * 3
+# наибольшая допустимая средняя разница яркости в одной клетке миниатюр:
+# пересохраненная или пережатая фотография отличается на ~1, снимок
+# со сдвинутой камеры - на 7-12, а новая фишка - на десятки, поэтому
+# порог выбран с запасом в сторону повторного распознавания
+THUMBNAIL_TOLERANCE = 4
+
+
+# author: Pavel
+def get_file_hash(path: Path, *salt) -> str:
+    """
+    Хэш содержимого файла вместе с настройками распознавания
+    Считается без декодирования изображения
+    :param path: путь к файлу
+    :param salt: настройки, от которых зависит результат распознавания
+    :return: хэш в шестнадцатеричной записи
+    """
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(Path(Path.cwd() / path), 'rb') as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b''):
+            hasher.update(chunk)
+    hasher.update(repr(salt).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+# author: Pavel
+def get_board_thumbnail(img_squared: np.ndarray) -> np.ndarray:
+    """
+    Миниатюра обрезанной доски в оттенках серого
+    По ней находятся почти одинаковые фотографии одной позиции
+    (повторная съемка, серийные снимки)
+    :param img_squared: обрезанная фотография доски
+    :return: массив THUMBNAIL_SIZE x THUMBNAIL_SIZE uint8
+    """
+
+    img = img_squared
+    if img.ndim == 3:
+        img = cv2.cvtColor(np.ascontiguousarray(img[..., :3]),
+                           cv2.COLOR_RGB2GRAY)
+    return cv2.resize(img, (THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+                      interpolation=cv2.INTER_AREA)
+
+
+# author: Pavel
+def get_thumbnails_distance(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    Расстояние между миниатюрами - наибольшая по клеткам
+    средняя разница яркости, т.е. одна изменившаяся клетка
+    уже делает миниатюры разными
+    :param first: миниатюра доски
+    :param second: миниатюра доски
+    :return: расстояние
+    """
+
+    diff = np.abs(first.astype(np.int16) - second.astype(np.int16))
+    cell = THUMBNAIL_SIZE // 15
+    return diff.reshape(15, cell, 15, cell).mean(axis=(1, 3)).max()
+
+
+# author: Pavel
+class RecognitionCache:
+    """
+    Кэш распознанных досок по содержимому фотографии
+    Ключ записи - хэш файла (см. get_file_hash), кроме того запись
+    находится по миниатюре обрезанной доски, если фотография другая,
+    но позиция на ней та же
+    Размер кэша ограничен, при переполнении удаляются давно
+    не использованные записи. При заданном пути кэш читается с диска
+    при создании и записывается после каждого добавления
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, path: Path = None,
+                 tolerance: float = THUMBNAIL_TOLERANCE):
+        """
+        :param max_bytes: наибольший суммарный размер записей в байтах
+        :param path: путь к файлу кэша на диске, None - только в памяти
+        :param tolerance: наибольшее расстояние между миниатюрами
+        одной позиции, None - искать только по хэшу файла
+        """
+
+        self.max_bytes = max_bytes
+        self.path = Path(Path.cwd() / path) if path is not None else None
+        self.tolerance = tolerance
+        # хэш файла -> (настройки, миниатюра, обрезанная доска, доска)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def get(self, file_hash: str) -> (np.ndarray, [[str]]):
+        """
+        Поиск записи по хэшу файла
+        :param file_hash: хэш файла
+        :return: (обрезанная доска, доска) или None
+        """
+
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is None:
+                return None
+            self._entries.move_to_end(file_hash)
+            return entry[2], _copy_board(entry[3])
+
+    def get_similar(self, thumbnail: np.ndarray, salt: tuple = ()) -> [[str]]:
+        """
+        Поиск доски по миниатюре среди записей с теми же настройками
+        :param thumbnail: миниатюра доски (см. get_board_thumbnail)
+        :param salt: настройки распознавания
+        :return: доска ближайшей подходящей записи или None
+        """
+
+        if self.tolerance is None:
+            return None
+        with self._lock:
+            best_key, best_distance = None, None
+            for key, (entry_salt, entry_thumbnail, _, _) in \
+                    self._entries.items():
+                if entry_salt != salt:
+                    continue
+                distance = get_thumbnails_distance(thumbnail, entry_thumbnail)
+                if distance <= self.tolerance and \
+                        (best_distance is None or distance < best_distance):
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return _copy_board(self._entries[best_key][3])
+
+    def put(self, file_hash: str, img_squared: np.ndarray, board: [[str]],
+            salt: tuple = (), thumbnail: np.ndarray = None):
+        """
+        Добавление записи
+        :param file_hash: хэш файла
+        :param img_squared: обрезанная фотография доски
+        :param board: распознанная доска
+        :param salt: настройки распознавания
+        :param thumbnail: миниатюра доски, если уже посчитана
+        """
+
+        if thumbnail is None:
+            thumbnail = get_board_thumbnail(img_squared)
+        entry = (salt, thumbnail, np.ascontiguousarray(img_squared),
+                 _copy_board(board))
+        with self._lock:
+            if file_hash in self._entries:
+                self._bytes -= _get_entry_size(self._entries.pop(file_hash))
+            self._entries[file_hash] = entry
+            self._bytes += _get_entry_size(entry)
+            self._evict()
+            if self.path is not None:
+                self._save()
+
+    def clear(self):
+        """
+        Удаление всех записей (и файла кэша на диске)
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.path is not None and self.path.exists():
+                self.path.unlink()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_hash: str) -> bool:
+        return file_hash in self._entries
+
+    def _evict(self):
+        # самые старые записи - в начале; последняя запись не удаляется,
+        # даже если одна больше ограничения
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= _get_entry_size(entry)
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # запись через временный файл, чтобы не оставить испорченный кэш
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        dump(list(self._entries.items()), tmp_path)
+        tmp_path.replace(self.path)
+
+    def _load(self):
+        try:
+            items = load(self.path)
+        except (OSError, EOFError, ValueError, TypeError):
+            # испорченный или старый кэш просто не используется
+            return
+        for file_hash, entry in items:
+            self._entries[file_hash] = entry
+            self._bytes += _get_entry_size(entry)
+        self._evict()
+
+
+def _copy_board(board: [[str]]) -> [[str]]:
+    return [list(row) for row in board]
+
+
+def _get_entry_size(entry: tuple) -> int:
+    _, thumbnail, img_squared, board = entry
+    return thumbnail.nbytes + img_squared.nbytes + 225 * 8
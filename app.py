@@ -1,21 +1,32 @@
 import sys
 from collections import Counter
+from pathlib import Path
 
-from PyQt5.QtCore import QSize, Qt
-from PyQt5.QtGui import QIcon, QPixmap, QKeyEvent
+import cv2
+import numpy as np
+from PyQt5.QtCore import QSize, Qt, QThreadPool
+from PyQt5.QtGui import QIcon, QImage, QPixmap, QKeyEvent
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, \
     QDesktopWidget, QFileDialog
 from skimage import img_as_ubyte
 from skimage.io import imread, imsave
 
+from app_workers import Task
 from CV.exceptions import CutException
-from CV.scan import cut_by_external_contour, cut_by_internal_contour
+from CV.memory import PeakMemory
+from CV.scan import BINARIZATION_ACCURATE, cut_by_external_contour, \
+    cut_by_internal_contour
 from ML.exceptions import ClfNotFoundException, ScNotFoundException, \
     DimRedNotFoundException
 from ML.letter_recognition import image_to_board
+from ML.model_registry import warm_up_models
+from ML.recognition_cache import CACHE_MAX_BYTES, RecognitionCache, \
+    get_board_thumbnail, get_file_hash
 from assistant.hint import get_board_with_hints, get_hint_value_coord
+from assistant.move import Move
 from assistant.scrabble_assistant import LETTERS_AMOUNT
-from assistant.scrabble_assistant import get_used_letters, get_n_hints
+from assistant.scrabble_assistant import BoardAnalysis, get_n_hints, \
+    get_used_letters
 # from assistant.scrabble_assistant import is_board_letters_amount_right
 from assistant.postprocessing import full_postprocessing
 from preprocessing.model import CLASSIFIER_DUMP_PATH, DIMRED_DUMP_PATH, \
@@ -33,11 +44,26 @@ class ScrabbleApplication(QWidget):
     _hints_amount = 3  # сколько подсказок выдавать
     _asterisk_active = False  # возможность выбрать кроме букв еще и *
     _console_output = True  # возможность выводить данные в консоль
+    _warm_up_models = True  # загрузка модели при старте, а не при распознавании
+    _binarization = BINARIZATION_ACCURATE  # режим перевода фото в ЧБ
+    # кэш распознанных досок: размер в байтах и файл на диске (None - нет)
+    _recognition_cache_size = CACHE_MAX_BYTES
+    _recognition_cache_path = None
+    # запись обрезанной доски на диск (для отладки)
+    _save_board_image = False
+    _board_image_path = 'resources/app_images/user_image.jpg'
+    # замер пиковой памяти распознавания (для отладки: трассировка
+    # памяти замедляет все потоки, в т.ч. поиск подсказок)
+    _measure_memory = False
+    # поиск подсказок в фоне, пока выбираются фишки
+    _speculative_search = True
 
     _chips_varieties = 0  # кол-во разновидностей фишек
 
     # доска в виде двумерного символьного массива
     _board = None
+    # разбор текущей доски для поиска подсказок
+    _board_analysis = None
 
     _width = 0  # 450 px для 1920
     _height = 0  # 805 px для 1080
@@ -61,6 +87,8 @@ class ScrabbleApplication(QWidget):
         'resources/app_images/chips/violet/',
         'resources/app_images/chips/pink/'
     ]
+    # изображения фишек в размере клетки: [цвет][номер буквы]
+    _chips_pixmaps = []
 
     # путь к css
     _stylesheet_path = 'resources/stylesheet/app.css'
@@ -103,6 +131,11 @@ class ScrabbleApplication(QWidget):
     _msg_dec_dump_error = f'Не найден дамп декомпозера в {DIMRED_DUMP_PATH}'
     _msg_sc_dump_error = f'Не найден дамп шкалировщика в {SCALER_DUMP_PATH}'
     _msg_unknown_recognition_error = 'Неизвестная ошибка распознавания'
+    _msg_recognition_started = 'Загрузка изображения...'
+    _msg_cut_progress = 'Обрезка доски...'
+    _msg_recognition_progress = 'Распознавание букв...'
+    _msg_search_started = 'Поиск подсказок...'
+    _msg_search_error = 'Ошибка поиска подсказок'
 
     _img_label = None  # label для изображения доски
     _board_img = None  # обрезанное изображение доски
@@ -110,6 +143,19 @@ class ScrabbleApplication(QWidget):
     _hints_labels = []  # фишки подсказок, отображаемые на экране
     _got_hints = False  # получена ли подсказка
 
+    # распознавание и поиск идут в пуле потоков; номер поколения
+    # увеличивается при каждом новом запросе, и результаты старых
+    # запросов отбрасываются
+    _thread_pool = None
+    _recognition_task = None
+    _recognition_generation = 0
+    _search_task = None
+    _search_generation = 0
+    _search_letters = None  # фишки идущего или законченного поиска
+    _search_hints = None  # найденные для них подсказки
+    _search_requested = False  # нажата ли кнопка "Найти"
+    _candidates_task = None  # сбор ходов доски при любых фишках
+
     def __init__(self):
         """
         Инициализация приложения
@@ -122,7 +168,25 @@ class ScrabbleApplication(QWidget):
         self.init_buttons()
         self.init_labels()
         self.init_ui()
+        self.init_chips_pixmaps()
         self.draw_widgets()
+        self._recognition_cache = RecognitionCache(
+            self._recognition_cache_size, self._recognition_cache_path)
+        self._thread_pool = QThreadPool(self)
+        # модель загружается один раз в потоке пула, окно при этом
+        # не замирает, а распознавание, начатое раньше конца загрузки,
+        # дождется ее (см. ML/model_registry.py)
+        if self._warm_up_models:
+            self._thread_pool.start(Task(0, self.warm_up,
+                                         CLASSIFIER_DUMP_PATH))
+
+    @staticmethod
+    def warm_up(task: Task, clf_path: Path) -> int:
+        """
+        Загрузка модели при старте (выполняется в потоке пула)
+        """
+
+        return warm_up_models(clf_path)
 
     def init_ui(self):
         """
@@ -156,6 +220,21 @@ class ScrabbleApplication(QWidget):
         self.setWindowIcon(QIcon(self._app_icon_path))
         self.show()
 
+    def init_chips_pixmaps(self):
+        """
+        Загрузка изображений фишек всех цветов один раз при старте,
+        сразу в размере фишки на изображении доски
+        """
+
+        # размер одной фишки на изображении
+        size = self._width // 15 - 2  # 28px
+        self._chips_pixmaps = []
+        for img_folder in self._chips_folders_paths:
+            self._chips_pixmaps.append(
+                [QPixmap(img_folder + 'letter' + str(chip_index + 1) +
+                         '.jpg').scaled(size, size)
+                 for chip_index in range(33)])
+
     def init_dicts(self):
         """
         Инициализация словарей
@@ -278,87 +357,135 @@ class ScrabbleApplication(QWidget):
         if not img_path:
             return
 
-        # обработка изображения
-        try:
-            img = img_as_ubyte(imread(img_path))  # считывание
-            # обрезка по внешнему контуру
-            img = img_as_ubyte(cut_by_external_contour(img))
-            # обрезка по внутреннему контуру
-            img_squared = img_as_ubyte(cut_by_internal_contour(img))
+        # распознавание предыдущей фотографии больше не нужно
+        if self._recognition_task is not None:
+            self._recognition_task.cancel()
+        self._recognition_generation += 1
+        self.cancel_search()
+        if self._candidates_task is not None:
+            self._candidates_task.cancel()
+            self._candidates_task = None
 
-        except (CutException, AttributeError, ValueError):
-            self._img_label.setPixmap(QPixmap())  # убираем изображение доски
-            self.clear_hint()
-            self._msg_label.setText(self._msg_scan_error)  # error msg
-            # блокировка кнопок
-            for i in range(self._chips_varieties):
-                self._letters_buttons[i].setDisabled(True)
-            self._drop_button.setDisabled(True)
-            self._start_button.setDisabled(True)
-            return
+        # пока доска распознается, искать подсказки нельзя
+        for i in range(self._chips_varieties):
+            self._letters_buttons[i].setDisabled(True)
+        self._drop_button.setDisabled(True)
+        self._start_button.setDisabled(True)
+        self._msg_label.setText(self._msg_recognition_started)
+
+        task = Task(self._recognition_generation, self.recognize_photo,
+                    img_path, self.get_recognition_salt())
+        task.signals.progress.connect(self.recognition_progress)
+        task.signals.finished.connect(self.recognition_finished)
+        task.signals.failed.connect(self.recognition_failed)
+        self._recognition_task = task
+        self._thread_pool.start(task)
+
+    def recognize_photo(self, task: Task, img_path: str,
+                        salt: tuple) -> (np.ndarray, [[str]], BoardAnalysis):
+        """
+        Обрезка и распознавание фотографии доски (выполняется в потоке пула,
+        поэтому не трогает виджеты)
+        Повторно загруженная фотография берется из кэша распознавания
+        Здесь же доска разбирается для поиска подсказок (BoardAnalysis)
+        :param task: задача (ход работы и отмена)
+        :param img_path: путь к фотографии
+        :param salt: настройки распознавания
+        :return: (обрезанная доска, доска после постобработки,
+        разбор доски)
+        """
 
-        # распознавание символов на доске
-        try:
-            board = image_to_board(img_squared, CLASSIFIER_DUMP_PATH)
+        # повторная загрузка той же фотографии - доска берется из кэша
+        file_hash = get_file_hash(img_path, *salt)
+        cached = self._recognition_cache.get(file_hash)
+        if cached is not None:
+            if self._console_output:
+                print('Доска найдена в кэше')
+            img_squared, board = cached
+            board = full_postprocessing(board)
+            return img_squared, board, BoardAnalysis(board)
 
+        task.report(self._msg_cut_progress)
+        try:
+            # замер пиковой памяти: фотография в полном разрешении
+            # живет только на этом этапе
+            with PeakMemory(self._measure_memory) as cut_memory:
+                img = img_as_ubyte(imread(img_path))  # считывание
+                task.check_cancelled()
+                # обрезка по внешнему контуру (сразу в уменьшенный размер)
+                img = cut_by_external_contour(img)
+                # обрезка по внутреннему контуру
+                img_squared = cut_by_internal_contour(img)
+        except (AttributeError, ValueError) as e:
+            raise CutException(str(e))
+        task.check_cancelled()
+
+        # почти такая же фотография той же позиции уже распознавалась
+        thumbnail = get_board_thumbnail(img_squared)
+        board = self._recognition_cache.get_similar(thumbnail, salt)
+        if board is not None:
+            if self._console_output:
+                print('Доска найдена в кэше по похожей фотографии')
+        else:
+            # распознавание символов на доске
+            task.report(self._msg_recognition_progress)
+            with PeakMemory(self._measure_memory) as recognition_memory:
+                board = image_to_board(img_squared, CLASSIFIER_DUMP_PATH,
+                                       binarization=salt[0])
+
+            if self._console_output and self._measure_memory:
+                print(f'Пиковая память: обрезка {cut_memory}, '
+                      f'распознавание {recognition_memory}')
             if self._console_output:
                 print('Результат: ')
-                for row in board:
-                    print('|', end='')
-                    for i in range(len(row)):
-                        if row[i] == '':
-                            print(' ', end='|')
-                        else:
-                            print(row[i], end='|')
-                    print()
+                print_board(board)
                 print()
-
-        except ClfNotFoundException:
-            self._msg_label.setText(self._msg_clf_dump_error)
-            return
-
-        except DimRedNotFoundException:
-            self._msg_label.setText(self._msg_dec_dump_error)
-            return
-
-        except ScNotFoundException:
-            self._msg_label.setText(self._msg_sc_dump_error)
-            return
-
-        except ValueError:
-            self._msg_label.setText(self._msg_clf_error)
-            return
-
-        except TypeError:
-            self._msg_label.setText(self._msg_unknown_recognition_error)
-            return
+        self._recognition_cache.put(file_hash, img_squared, board, salt,
+                                    thumbnail)
+        task.check_cancelled()
 
         # постобработка доски
         board = full_postprocessing(board)
-
-        self._board = board
-
         if self._console_output:
             print('Постобработка: ')
-            for row in board:
-                print('|', end='')
-                for i in range(len(row)):
-                    if row[i] == '':
-                        print(' ', end='|')
-                    else:
-                        print(row[i], end='|')
-                print()
+            print_board(board)
+        # все, что для поиска подсказок не зависит от фишек игрока,
+        # считается один раз на доску
+        return img_squared, board, BoardAnalysis(board)
 
-        # записываем изображение
-        imsave('resources/app_images/user_image.jpg', img_squared)
+    def recognition_progress(self, generation: int, message: str):
+        """
+        Вывод хода распознавания
+        """
+
+        if generation == self._recognition_generation:
+            self._msg_label.setText(message)
 
-        # считываем изображение
-        img = QPixmap('resources/app_images/user_image.jpg')
-        # уменьшаем до размеров экрана
-        img = img.scaled(self._width, self._width)
+    def recognition_finished(self, generation: int,
+                             result: (np.ndarray, [[str]], BoardAnalysis)):
+        """
+        Показ распознанной доски (результаты устаревших задач отбрасываются)
+        """
 
-        # сохраняем
-        self._board_img = img
+        if generation != self._recognition_generation:
+            return
+        self._recognition_task = None
+        img_squared, self._board, analysis = result
+        self._board_analysis = analysis
+        # ходы доски при любых фишках собираются в фоне один раз,
+        # после чего поиск для каждого набора фишек только отбирает их
+        if self._speculative_search:
+            self._candidates_task = Task(generation,
+                                         self.prepare_candidates, analysis)
+            self._thread_pool.start(self._candidates_task)
+
+        # для отладки изображение можно записать на диск
+        if self._save_board_image:
+            imsave(self._board_image_path, img_squared)
+
+        # изображение уменьшается до размеров экрана и показывается
+        # без записи на диск
+        self._board_img = array_to_pixmap(img_squared, int(self._width))
         self._img_label.setPixmap(self._board_img)
 
         # если кол-во всех букв на доске не больше допустимого
@@ -377,6 +504,51 @@ class ScrabbleApplication(QWidget):
         #     # если превышено кол-во хоть одной из букв
         #     self._msg_label.setText(self._msg_too_many_letters_error)
 
+    def recognition_failed(self, generation: int, error: Exception):
+        """
+        Вывод ошибки распознавания
+        """
+
+        if generation != self._recognition_generation:
+            return
+        self._recognition_task = None
+
+        if isinstance(error, CutException):
+            self._img_label.setPixmap(QPixmap())  # убираем изображение доски
+            self._board_img = None
+            self.clear_hint()
+            self._msg_label.setText(self._msg_scan_error)  # error msg
+            return
+        if isinstance(error, ClfNotFoundException):
+            self._msg_label.setText(self._msg_clf_dump_error)
+        elif isinstance(error, DimRedNotFoundException):
+            self._msg_label.setText(self._msg_dec_dump_error)
+        elif isinstance(error, ScNotFoundException):
+            self._msg_label.setText(self._msg_sc_dump_error)
+        elif isinstance(error, ValueError):
+            self._msg_label.setText(self._msg_clf_error)
+        else:
+            self._msg_label.setText(self._msg_unknown_recognition_error)
+
+        # прежняя доска остается на экране - с ней можно работать дальше
+        if self._board_img is not None:
+            self._start_button.setDisabled(False)
+            for i in range(self._chips_varieties):
+                self._letters_buttons[i].setDisabled(False)
+            self._drop_button.setDisabled(False)
+
+    def get_recognition_salt(self) -> tuple:
+        """
+        Настройки, от которых зависит результат распознавания:
+        режим перевода в ЧБ и версия дампа классификатора
+        """
+
+        try:
+            clf_version = CLASSIFIER_DUMP_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            clf_version = None
+        return self._binarization, clf_version
+
     def clear_widgets(self):
         """
         Обновление всех виджетов
@@ -384,6 +556,8 @@ class ScrabbleApplication(QWidget):
 
         # повторная инициализация словарей
         self.init_dicts()
+        self._search_requested = False
+        self.rack_changed()
         # обновляем кнопки
         self.update_buttons()
         # сбрасываем msg
@@ -546,6 +720,7 @@ class ScrabbleApplication(QWidget):
                 self._chosen_letters[letter] += 1
                 # обновляем цвет фишек
                 self.update_buttons()
+                self.rack_changed()
 
     def keyPressEvent(self, event: QKeyEvent):
         """
@@ -617,6 +792,9 @@ class ScrabbleApplication(QWidget):
     def start_btn_pressed(self):
         """
         Запуск алгоритма
+        Поиск идет в потоке пула, подсказки рисует show_hints.
+        Обычно поиск для выбранных фишек уже идет или закончен
+        (см. rack_changed), тогда новый поиск не запускается
         """
         # очистка подсказки, если запуск идет не в первый раз
         if self._got_hints:
@@ -627,31 +805,133 @@ class ScrabbleApplication(QWidget):
         elif self._board_img is None:
             self._msg_label.setText(self._msg_no_img_error)
         else:
-            # время начала
-            # t = time.time()
-
-            # запуск алгоритма
-            hints, values = get_n_hints(self._board,
-                                        Counter(self._chosen_letters),
-                                        self._hints_amount)
-            # время окончания
-            # print(time.time() - t)
-
-            if len(hints) != 0:
-                # отрисовка подсказки на экране
-                self.draw_hint(hints, values)
-                # выводим стоимость подсказки
-                self._msg_label.setText(self._msg_got_hint)
-                self._got_hints = True
-            else:
-                self._msg_label.setText(self._msg_no_hints)
+            self._search_requested = True
+            letters = Counter(self._chosen_letters)
+            # подсказки для этих фишек уже найдены заранее
+            if self._search_hints is not None and \
+                    self._search_letters == letters:
+                self.show_hints(self._search_hints)
+                return
+            # иначе ждем идущий поиск или запускаем новый
+            if self._search_task is None or self._search_letters != letters:
+                self.start_search()
+            self._msg_label.setText(self._msg_search_started)
+
+    def start_search(self):
+        """
+        Запуск поиска подсказок для текущих доски и фишек
+        Предыдущий поиск отменяется
+        """
 
-            # блокировака кнопок
-            for i in range(self._chips_varieties):
-                self._letters_buttons[i].setDisabled(True)
-            self._start_button.setDisabled(True)
+        self.cancel_search()
+        self._search_letters = Counter(self._chosen_letters)
+        task = Task(self._search_generation, self.search_hints,
+                    self._board_analysis, self._search_letters,
+                    self._hints_amount)
+        task.signals.finished.connect(self.search_finished)
+        task.signals.failed.connect(self.search_failed)
+        self._search_task = task
+        self._thread_pool.start(task)
+
+    def cancel_search(self):
+        """
+        Отмена идущего поиска: его результат будет отброшен
+        """
+
+        self._search_generation += 1
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+        self._search_letters = None
+        self._search_hints = None
+
+    def rack_changed(self):
+        """
+        Фишки игрока изменились: подсказки для прежних фишек
+        больше не нужны. Поиск для новых фишек сразу запускается в фоне
+        (или перезапускается, если кнопка "Найти" уже нажата), и
+        к нажатию "Найти" подсказки обычно уже готовы
+        """
+
+        self.cancel_search()
+        if self._board_analysis is not None and \
+                sum(self._chosen_letters.values()) != 0 and \
+                (self._speculative_search or self._search_requested):
+            self.start_search()
 
-    def draw_hint(self, hints: [[[str]]], values: [int]):
+    @staticmethod
+    def search_hints(task: Task, analysis: BoardAnalysis, letters: Counter,
+                     n: int) -> [Move]:
+        """
+        Поиск подсказок (выполняется в потоке пула)
+        Отмененный поиск прерывается перед очередной линией доски
+        """
+
+        # время начала
+        # t = time.time()
+        hints = get_n_hints(analysis.board, letters, n, analysis=analysis,
+                            check_cancelled=task.check_cancelled)
+        # время окончания
+        # print(time.time() - t)
+        return hints
+
+    @staticmethod
+    def prepare_candidates(task: Task, analysis: BoardAnalysis):
+        """
+        Сбор ходов доски при любых фишках (выполняется в потоке пула)
+        Линии, до которых сбор еще не дошел, поиск обходит по словарю
+        """
+
+        analysis.prepare_candidates(task.check_cancelled)
+
+    def search_finished(self, generation: int, hints: [Move]):
+        """
+        Запоминание подсказок и их вывод, если кнопка "Найти" нажата
+        (результаты устаревших поисков отбрасываются)
+        """
+
+        if generation != self._search_generation:
+            return
+        self._search_task = None
+        self._search_hints = hints
+        if self._search_requested:
+            self.show_hints(hints)
+
+    def search_failed(self, generation: int, error: Exception):
+        """
+        Вывод ошибки поиска
+        """
+
+        if generation != self._search_generation:
+            return
+        self._search_task = None
+        if self._search_requested:
+            self._search_requested = False
+            self._msg_label.setText(self._msg_search_error)
+        if self._console_output:
+            print(f'Ошибка поиска подсказок: {error!r}')
+
+    def show_hints(self, hints: [Move]):
+        """
+        Вывод найденных подсказок
+        """
+
+        self._search_requested = False
+        if len(hints) != 0:
+            # отрисовка подсказки на экране
+            self.draw_hint(hints)
+            # выводим стоимость подсказки
+            self._msg_label.setText(self._msg_got_hint)
+            self._got_hints = True
+        else:
+            self._msg_label.setText(self._msg_no_hints)
+
+        # блокировака кнопок
+        for i in range(self._chips_varieties):
+            self._letters_buttons[i].setDisabled(True)
+        self._start_button.setDisabled(True)
+
+    def draw_hint(self, hints: [Move]):
         """
         Отрисовка подсказок на экране
         """
@@ -666,33 +946,23 @@ class ScrabbleApplication(QWidget):
             # если цвета закончились - идем по новому кругу
             color_index = i % len(self._colors)
 
-            # идем по доске подсказок
-            for y in range(len(hints[i])):
-                for x in range(len(hints[i][y])):
-                    # отрисовываем букву если:
-                    # на подсказке эта буква есть
-                    # а на доске этой буквы еще нет
-                    if hints[i][y][x] != '' and self._board[y][x] == '':
-                        # поиск индекса буквы в алфавите
-                        # отдельная обработка звездочки
-                        if hints[i][y][x] == '*':
-                            chip_index = 32
-                        else:
-                            chip_index = ord(hints[i][y][x]) - 1072
-
-                        img_folder = self._chips_folders_paths[color_index]
-                        img_filename = 'letter' + str(chip_index + 1) + '.jpg'
-
-                        # размер одной фишки на изображении,
-                        # масштабирование изображения под фишку
-                        size = self._width // 15 - 2  # 28px
-                        pix = QPixmap(img_folder + img_filename).\
-                            scaled(size, size)
-
-                        # находим нужный label в массиве
-                        hint_label = self._hints_labels[y * 15 + x]
-                        # установка изображения
-                        hint_label.setPixmap(pix)
+            # отрисовываем только новые фишки подсказки:
+            # буквы, которых на доске еще нет
+            for y, x, letter in hints[i].get_placed_cells():
+                # поиск индекса буквы в алфавите
+                # отдельная обработка звездочки
+                if letter == '*':
+                    chip_index = 32
+                else:
+                    chip_index = ord(letter) - 1072
+
+                # готовое изображение фишки (см. init_chips_pixmaps)
+                pix = self._chips_pixmaps[color_index][chip_index]
+
+                # находим нужный label в массиве
+                hint_label = self._hints_labels[y * 15 + x]
+                # установка изображения
+                hint_label.setPixmap(pix)
 
             # отрисовка ценности подсказки
             # определяем слово как гориз. или верт.
@@ -701,12 +971,57 @@ class ScrabbleApplication(QWidget):
             y, x = get_hint_value_coord(hints[i], combined_board)
             combined_board[y][x] = '$'
             label = self._hints_labels[y * 15 + x]
-            label.setText(str(values[i]))
+            label.setText(str(hints[i].score))
             label.setStyleSheet('color: white; '
                                 'background-color: '
                                 + self._colors[color_index])
 
 
+# author: Pavel
+def array_to_pixmap(img: np.ndarray, size: int) -> QPixmap:
+    """
+    Изображение numpy в QPixmap без записи на диск
+    Сначала изображение уменьшается до size x size, затем QImage
+    создается прямо поверх памяти массива (без копирования),
+    и только QPixmap копирует уменьшенное изображение
+    :param img: изображение RGB или в оттенках серого (uint8)
+    :param size: сторона результата в px
+    :return: QPixmap size x size
+    """
+
+    interpolation = cv2.INTER_AREA if min(img.shape[:2]) >= size \
+        else cv2.INTER_LINEAR
+    img = np.ascontiguousarray(cv2.resize(img_as_ubyte(img), (size, size),
+                                          interpolation=interpolation))
+    if img.ndim == 2:
+        image = QImage(img.data, size, size, img.strides[0],
+                       QImage.Format_Grayscale8)
+    else:
+        if img.shape[2] == 4:
+            img = np.ascontiguousarray(img[..., :3])
+        image = QImage(img.data, size, size, img.strides[0],
+                       QImage.Format_RGB888)
+    # QImage не владеет памятью массива - QPixmap создается,
+    # пока массив жив
+    return QPixmap.fromImage(image)
+
+
+# author: Pavel
+def print_board(board: [[str]]):
+    """
+    Вывод доски в консоль
+    """
+
+    for row in board:
+        print('|', end='')
+        for i in range(len(row)):
+            if row[i] == '':
+                print(' ', end='|')
+            else:
+                print(row[i], end='|')
+        print()
+
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)  # создание объекта приложения
     scrabble = ScrabbleApplication()  # создание объекта главного виджета
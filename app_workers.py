@@ -0,0 +1,89 @@
+from threading import Event
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+# author: Pavel
+class TaskCancelledException(Exception):
+    """
+    Исключение, выбрасываемое внутри задачи, если она отменена
+    """
+    pass
+
+
+# author: Pavel
+class TaskSignals(QObject):
+    """
+    Сигналы задачи. Испускаются в потоке пула, а обработчики окна
+    вызываются в потоке интерфейса (очередь событий Qt)
+    Первый аргумент каждого сигнала - номер поколения задачи, по нему
+    окно отбрасывает результаты устаревших задач
+    """
+
+    progress = pyqtSignal(int, str)  # поколение, сообщение
+    finished = pyqtSignal(int, object)  # поколение, результат
+    failed = pyqtSignal(int, object)  # поколение, исключение
+
+
+# author: Pavel
+class Task(QRunnable):
+    """
+    Задача для QThreadPool: вызывает func(task, *args, **kwargs)
+    Функция может сообщать о ходе работы через task.report()
+    и прерываться в удобных местах через task.check_cancelled()
+    """
+
+    def __init__(self, generation: int, func, *args, **kwargs):
+        """
+        :param generation: номер поколения задачи
+        :param func: функция задачи, первый аргумент - сама задача
+        """
+
+        super().__init__()
+        self.generation = generation
+        self.signals = TaskSignals()
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._cancelled = Event()
+
+    def cancel(self):
+        """
+        Отмена задачи: результат не будет выдан, а функция прервется
+        при следующей проверке check_cancelled()
+        """
+
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """
+        Прерывание функции задачи, если задача отменена
+        """
+
+        if self._cancelled.is_set():
+            raise TaskCancelledException
+
+    def report(self, message: str):
+        """
+        Сообщение о ходе работы (если задача не отменена)
+        """
+
+        if not self._cancelled.is_set():
+            self.signals.progress.emit(self.generation, message)
+
+    def run(self):
+        if self._cancelled.is_set():
+            return
+        try:
+            result = self._func(self, *self._args, **self._kwargs)
+        except TaskCancelledException:
+            return
+        except Exception as e:
+            if not self._cancelled.is_set():
+                self.signals.failed.emit(self.generation, e)
+            return
+        if not self._cancelled.is_set():
+            self.signals.finished.emit(self.generation, result)
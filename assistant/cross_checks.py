@@ -0,0 +1,164 @@
+import numpy as np
+
+from assistant.gaddag import ALPHABET, LETTER_CODES, SEPARATOR, Gaddag
+
+# направления хода
+ACROSS = 0  # по горизонтали (перпендикулярное слово - вертикальное)
+DOWN = 1  # по вертикали (перпендикулярное слово - горизонтальное)
+
+# маска, в которой разрешены все буквы алфавита (33 бита)
+ALL_LETTERS_MASK = (1 << len(ALPHABET)) - 1
+# частичная ценность клетки, у которой нет перпендикулярного слова
+NO_CROSS_WORD = -1
+
+
+# author: Pavel
+class CrossChecks:
+    """
+    Перекрестные проверки пустых клеток доски
+    Для каждой пустой клетки и каждого направления хода хранится
+    33-битная маска букв, с которыми перпендикулярное слово
+    есть в словаре, и частичная ценность перпендикулярного слова
+    (сумма ценностей уже стоящих в нем фишек, без бонусов).
+    Генератор ходов отсекает букву одной операцией AND с маской
+    """
+
+    def __init__(self, board: [[str]], gaddag: Gaddag,
+                 letters_values: dict):
+        """
+        Расчет проверок для всех клеток доски
+        :param board: доска в виде двумерного символьного массива
+        :param gaddag: GADDAG словаря
+        :param letters_values: словарь с ценностью букв
+        """
+
+        self._gaddag = gaddag
+        self._letters_values = letters_values
+        self._board = [list(row) for row in board]
+
+        height, width = len(board), len(board[0])
+        # маски букв: [направление][y][x]
+        self.masks = np.zeros((2, height, width), dtype=np.uint64)
+        # частичные ценности: [направление][y][x]
+        self.scores = np.full((2, height, width), NO_CROSS_WORD,
+                              dtype=np.int32)
+
+        for y in range(height):
+            for x in range(width):
+                self._check_square(y, x)
+
+    def update(self, cells: [(int, int, str)]):
+        """
+        Обновление проверок после изменения доски
+        Пересчитываются только сами клетки и ближайшие к ним пустые клетки
+        по вертикали и горизонтали - только их перпендикулярные слова
+        могли измениться
+        :param cells: измененные клетки в формате (y, x, новый символ)
+        """
+
+        for y, x, symbol in cells:
+            self._board[y][x] = symbol
+
+        squares = set()
+        for y, x, _ in cells:
+            squares.add((y, x))
+            for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                ny, nx = y + dy, x + dx
+                # пропускаем фишки до первой пустой клетки
+                while self._is_inside(ny, nx) and self._board[ny][nx]:
+                    ny, nx = ny + dy, nx + dx
+                if self._is_inside(ny, nx):
+                    squares.add((ny, nx))
+
+        for y, x in squares:
+            self._check_square(y, x)
+
+    def get_line_checks(self, direction: int, index: int) -> ([int], [int]):
+        """
+        Маски и частичные ценности одной линии хода
+        :param direction: ACROSS - строка доски, DOWN - столбец
+        :param index: индекс строки или столбца
+        :return: маски и частичные ценности клеток линии в виде списков
+        """
+
+        if direction == ACROSS:
+            masks = self.masks[ACROSS, index, :]
+            scores = self.scores[ACROSS, index, :]
+        else:
+            masks = self.masks[DOWN, :, index]
+            scores = self.scores[DOWN, :, index]
+        return [int(mask) for mask in masks], scores.tolist()
+
+    def _is_inside(self, y: int, x: int) -> bool:
+        return 0 <= y < len(self._board) and 0 <= x < len(self._board[0])
+
+    def _check_square(self, y: int, x: int):
+        """
+        Расчет проверок одной клетки по обоим направлениям
+        """
+
+        # на занятую клетку ставить нельзя
+        if self._board[y][x]:
+            self.masks[:, y, x] = 0
+            self.scores[:, y, x] = NO_CROSS_WORD
+            return
+
+        # для хода по горизонтали перпендикулярное слово идет сверху вниз,
+        # для хода по вертикали - слева направо
+        for direction, (dy, dx) in ((ACROSS, (1, 0)), (DOWN, (0, 1))):
+            before = self._collect_tiles(y, x, -dy, -dx)[::-1]
+            after = self._collect_tiles(y, x, dy, dx)
+            if not before and not after:
+                self.masks[direction, y, x] = ALL_LETTERS_MASK
+                self.scores[direction, y, x] = NO_CROSS_WORD
+            else:
+                self.masks[direction, y, x] = \
+                    self._get_cross_mask(before, after)
+                self.scores[direction, y, x] = \
+                    sum(self._letters_values.get(letter, 0)
+                        for letter in before + after)
+
+    def _collect_tiles(self, y: int, x: int, dy: int, dx: int) -> [str]:
+        """
+        Фишки, стоящие подряд от клетки в заданном направлении
+        :return: буквы в порядке удаления от клетки
+        """
+
+        tiles = []
+        y, x = y + dy, x + dx
+        while self._is_inside(y, x) and self._board[y][x]:
+            tiles.append(self._board[y][x])
+            y, x = y + dy, x + dx
+        return tiles
+
+    def _get_cross_mask(self, before: [str], after: [str]) -> int:
+        """
+        Маска букв, которые можно поставить между частями
+        перпендикулярного слова
+        Для каждой буквы из корня GADDAG проходится запись
+        буква + перевернутое начало + разделитель + конец
+        :param before: фишки перед клеткой
+        :param after: фишки после клетки
+        :return: маска разрешенных букв
+        """
+
+        gaddag = self._gaddag
+        mask = 0
+        for code, node in gaddag.arcs(gaddag.root):
+            if code == SEPARATOR:
+                continue
+            for letter in reversed(before):
+                node = gaddag.child(node, LETTER_CODES.get(letter, -1))
+                if node == -1:
+                    break
+            if node == -1:
+                continue
+            if after:
+                node = gaddag.child(node, SEPARATOR)
+                for letter in after:
+                    if node == -1:
+                        break
+                    node = gaddag.child(node, LETTER_CODES.get(letter, -1))
+            if node != -1 and gaddag.is_terminal(node):
+                mask |= 1 << (code - 1)
+        return mask
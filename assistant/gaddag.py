@@ -0,0 +1,314 @@
+import hashlib
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from assistant.read_files import read_txt_to_tuple
+
+# алфавит игры, номер буквы в алфавите + 1 - ее код в GADDAG
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя*'
+# код буквы по самой букве
+LETTER_CODES = {letter: i + 1 for i, letter in enumerate(ALPHABET)}
+# код разделителя: слева от него перевернутое начало слова, справа - конец
+SEPARATOR = 0
+
+# расширение файла со скомпилированным GADDAG (рядом с .txt словарем)
+GADDAG_SUFFIX = '.gaddag'
+
+# заголовок файла: сигнатура, версия формата, sha1 исходного словаря,
+# кол-во узлов, кол-во дуг
+_HEADER = struct.Struct('<4sH20sII')
+_MAGIC = b'GDDG'
+_VERSION = 1
+
+
+# author: Pavel
+class Gaddag:
+    """
+    GADDAG - минимизированный автомат, в котором каждое слово записано
+    всеми способами вида: перевернутое начало + разделитель + конец.
+    Позволяет растить слово от любой буквы в обе стороны.
+    Хранится в плоских массивах: дуги узла i лежат в диапазоне
+    arc_offsets[i]:arc_offsets[i + 1], отсортированы по коду буквы
+    """
+
+    # корень автомата всегда имеет номер 0
+    root = 0
+
+    def __init__(self, arc_offsets: array, terminals: array,
+                 arc_labels: array, arc_targets: array):
+        """
+        :param arc_offsets: индекс первой дуги каждого узла (+ конец)
+        :param terminals: 1, если на узле заканчивается запись слова
+        :param arc_labels: код буквы каждой дуги
+        :param arc_targets: узел, в который ведет каждая дуга
+        """
+
+        self.arc_offsets = arc_offsets
+        self.terminals = terminals
+        self.arc_labels = arc_labels
+        self.arc_targets = arc_targets
+
+    def child(self, node: int, code: int) -> int:
+        """
+        Переход по дуге с заданной буквой
+        :param node: номер узла
+        :param code: код буквы
+        :return: номер дочернего узла, -1 если дуги нет
+        """
+
+        labels = self.arc_labels
+        for arc in range(self.arc_offsets[node], self.arc_offsets[node + 1]):
+            if labels[arc] == code:
+                return self.arc_targets[arc]
+            if labels[arc] > code:
+                break
+        return -1
+
+    def arcs(self, node: int) -> [(int, int)]:
+        """
+        Все дуги узла
+        :param node: номер узла
+        :return: пары (код буквы, дочерний узел)
+        """
+
+        start, end = self.arc_offsets[node], self.arc_offsets[node + 1]
+        return zip(self.arc_labels[start:end], self.arc_targets[start:end])
+
+    def is_terminal(self, node: int) -> bool:
+        return self.terminals[node] == 1
+
+    def __contains__(self, word: str) -> bool:
+        # слово целиком в перевернутом виде (без разделителя)
+        node = self.root
+        for letter in reversed(word):
+            code = LETTER_CODES.get(letter)
+            if code is None:
+                return False
+            node = self.child(node, code)
+            if node == -1:
+                return False
+        return self.is_terminal(node)
+
+    @property
+    def nodes_amount(self) -> int:
+        return len(self.terminals)
+
+
+# author: Pavel
+def get_gaddag_strings(word: str) -> [(int,)]:
+    """
+    Все записи слова в GADDAG в виде кодов букв:
+    перевернутое начало длины 1..n-1 + разделитель + конец,
+    а также все слово в перевернутом виде без разделителя
+    :param word: слово
+    :return: массив записей
+    """
+
+    codes = [LETTER_CODES[letter] for letter in word]
+    strings = [tuple(reversed(codes))]
+    for i in range(1, len(codes)):
+        strings.append(tuple(reversed(codes[:i])) + (SEPARATOR,) +
+                       tuple(codes[i:]))
+    return strings
+
+
+# author: Pavel
+def compile_gaddag(words: (str,)) -> Gaddag:
+    """
+    Компиляция списка слов в минимизированный GADDAG
+    Записи вставляются в отсортированном порядке, одинаковые
+    поддеревья сразу сливаются (инкрементальный алгоритм Дацюка)
+    Слова с символами вне алфавита игры пропускаются
+    :param words: слова
+    :return: скомпилированный GADDAG
+    """
+
+    strings = set()
+    for word in words:
+        if word and all(letter in LETTER_CODES for letter in word):
+            strings.update(get_gaddag_strings(word))
+
+    children = [{}]  # дуги каждого узла: {код буквы: узел}
+    terminals = [False]
+    register = {}  # уже минимизированные узлы по их сигнатуре
+    unchecked = []  # путь последней записи: (родитель, код, узел)
+
+    def minimize(down_to: int):
+        while len(unchecked) > down_to:
+            parent, code, child = unchecked.pop()
+            signature = (terminals[child],
+                         tuple(sorted(children[child].items())))
+            if signature in register:
+                children[parent][code] = register[signature]
+            else:
+                register[signature] = child
+
+    previous = ()
+    for string in sorted(strings):
+        # длина общего префикса с предыдущей записью
+        common = 0
+        while common < len(previous) and common < len(string) and \
+                previous[common] == string[common]:
+            common += 1
+        minimize(common)
+
+        node = unchecked[-1][2] if unchecked else 0
+        for code in string[common:]:
+            children.append({})
+            terminals.append(False)
+            child = len(children) - 1
+            children[node][code] = child
+            unchecked.append((node, code, child))
+            node = child
+        terminals[node] = True
+        previous = string
+    minimize(0)
+
+    # перенумерация достижимых узлов в плоские массивы
+    numbers = {0: 0}
+    order = [0]
+    for node in order:
+        for code, child in sorted(children[node].items()):
+            if child not in numbers:
+                numbers[child] = len(order)
+                order.append(child)
+
+    arc_offsets = array('I', [0])
+    node_terminals = array('B')
+    arc_labels = array('B')
+    arc_targets = array('I')
+    for node in order:
+        for code, child in sorted(children[node].items()):
+            arc_labels.append(code)
+            arc_targets.append(numbers[child])
+        arc_offsets.append(len(arc_labels))
+        node_terminals.append(1 if terminals[node] else 0)
+
+    return Gaddag(arc_offsets, node_terminals, arc_labels, arc_targets)
+
+
+# author: Pavel
+def get_gaddag_path(dictionary_path: Path) -> Path:
+    """
+    Путь к скомпилированному GADDAG рядом с текстовым словарем
+    :param dictionary_path: путь к текстовому словарю
+    :return: путь к файлу .gaddag
+    """
+
+    return Path(dictionary_path).with_suffix(GADDAG_SUFFIX)
+
+
+# author: Pavel
+def get_file_digest(path: Path) -> bytes:
+    """
+    sha1 содержимого файла
+    :param path: путь к файлу
+    :return: 20 байт хеша
+    """
+
+    with open(Path(Path.cwd() / path), 'rb') as file:
+        return hashlib.sha1(file.read()).digest()
+
+
+# author: Pavel
+def save_gaddag(gaddag: Gaddag, path: Path, source_digest: bytes):
+    """
+    Сохранение GADDAG в бинарный файл
+    Числа записываются в little-endian
+    :param gaddag: GADDAG
+    :param path: путь к файлу
+    :param source_digest: sha1 словаря, из которого собран GADDAG
+    """
+
+    arrays = [gaddag.arc_offsets, gaddag.terminals,
+              gaddag.arc_labels, gaddag.arc_targets]
+    if sys.byteorder != 'little':
+        arrays = [array(a.typecode, a) for a in arrays]
+        for a in arrays:
+            a.byteswap()
+
+    with open(Path(Path.cwd() / path), 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, source_digest,
+                                gaddag.nodes_amount, len(gaddag.arc_labels)))
+        for a in arrays:
+            a.tofile(file)
+
+
+# author: Pavel
+def read_gaddag(path: Path, source_digest: bytes = None) -> Gaddag:
+    """
+    Чтение GADDAG из бинарного файла
+    :param path: путь к файлу
+    :param source_digest: ожидаемый sha1 исходного словаря,
+    если не None и не совпадает с записанным - файл считается устаревшим
+    :return: GADDAG или None, если файл устарел или поврежден
+    """
+
+    with open(Path(Path.cwd() / path), 'rb') as file:
+        header = file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            return None
+        magic, version, digest, nodes, arcs = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            return None
+        if source_digest is not None and digest != source_digest:
+            return None
+
+        arrays = []
+        for typecode, size in (('I', nodes + 1), ('B', nodes),
+                               ('B', arcs), ('I', arcs)):
+            a = array(typecode)
+            try:
+                a.fromfile(file, size)
+            except EOFError:
+                return None
+            if sys.byteorder != 'little':
+                a.byteswap()
+            arrays.append(a)
+
+    return Gaddag(*arrays)
+
+
+# author: Pavel
+def load_gaddag(dictionary_path: Path) -> Gaddag:
+    """
+    Загрузка GADDAG для текстового словаря
+    Если рядом со словарем лежит собранный из него же файл .gaddag,
+    читается он. Иначе (файла нет или словарь изменился)
+    GADDAG компилируется заново и сохраняется рядом со словарем
+    :param dictionary_path: путь к текстовому словарю
+    :return: GADDAG
+    """
+
+    gaddag_path = get_gaddag_path(dictionary_path)
+    digest = get_file_digest(dictionary_path)
+
+    if Path(Path.cwd() / gaddag_path).exists():
+        gaddag = read_gaddag(gaddag_path, digest)
+        if gaddag is not None:
+            return gaddag
+
+    return build_gaddag_file(dictionary_path, digest)
+
+
+# author: Pavel
+def build_gaddag_file(dictionary_path: Path,
+                      source_digest: bytes = None) -> Gaddag:
+    """
+    Компиляция текстового словаря в GADDAG и запись его рядом со словарем
+    Если записать файл не удалось (нет прав), GADDAG просто возвращается
+    :param dictionary_path: путь к текстовому словарю
+    :param source_digest: sha1 словаря, если уже посчитан
+    :return: GADDAG
+    """
+
+    if source_digest is None:
+        source_digest = get_file_digest(dictionary_path)
+    gaddag = compile_gaddag(read_txt_to_tuple(dictionary_path))
+    try:
+        save_gaddag(gaddag, get_gaddag_path(dictionary_path), source_digest)
+    except OSError:
+        pass
+    return gaddag
@@ -1,57 +1,46 @@
+from assistant.cross_checks import ACROSS
+from assistant.move import Move
 
 
 # author - Pavel
-def is_hint_horizontal(hint: [[str]]) -> bool:
+def is_hint_horizontal(hint: Move) -> bool:
     """
     Проверка подсказки на горизонтальное расположение
-    :param hint: матрица с символами подсказки (одно слово)
+    :param hint: ход подсказки
     :return: true - подсказка горизонтальная
     """
 
-    for row in hint:
-        for i in range(1, len(row)):
-            if row[i] and row[i - 1]:
-                return True
+    return hint.direction == ACROSS
 
 
 # author - Pavel
-def get_hint_start_coord(hint: [[str]]) -> (int, int):
+def get_hint_start_coord(hint: Move) -> (int, int):
     """
     Получение координаты первого символа подсказки
-    :param hint: матрица с символами подсказки (одно слово)
+    :param hint: ход подсказки
     :return: координаты первой буквы подсказки в формате y, x
     """
 
-    # ищем первую букву, начиная с начала
-    for i in range(len(hint)):
-        for j in range(len(hint[i])):
-            if hint[i][j]:
-                return i, j
-    return -1, -1
+    return hint.row, hint.col
 
 
 # author - Pavel
-def get_hint_end_coord(hint: [[str]]) -> (int, int):
+def get_hint_end_coord(hint: Move) -> (int, int):
     """
     Получение координаты последнего символа подсказки
-    :param hint: матрица с символами подсказки (одно слово)
+    :param hint: ход подсказки
     :return: координаты последней буквы подсказки в формате y, x
     """
 
-    # ищем первую букву, начиная с конца
-    for i in range(len(hint) - 1, -1, -1):
-        for j in range(len(hint[i]) - 1, -1, -1):
-            if hint[i][j]:
-                return i, j
-    return -1, -1
+    return hint.get_end()
 
 
 # author - Pavel
-def get_board_with_hints(board: [[str]], hints: [[str]]) -> [[str]]:
+def get_board_with_hints(board: [[str]], hints: [Move]) -> [[str]]:
     """
     Объединение доски с непересекающимися подсказками
     :param board: доска в виде двумерного символьного массива
-    :param hints: подсказки в виде двумерных символьных массивов
+    :param hints: ходы подсказок
     :return: объединенный двумерный символьный массив
     """
 
@@ -60,20 +49,18 @@ def get_board_with_hints(board: [[str]], hints: [[str]]) -> [[str]]:
         result.append(row.copy())
 
     for hint in hints:
-        for i in range(len(hint)):
-            for j in range(len(hint[0])):
-                if hint[i][j]:
-                    result[i][j] = hint[i][j]
+        for y, x, letter in hint.get_cells():
+            result[y][x] = letter
     return result
 
 
 # author: Pavel
-def get_hint_value_coord(hint: [[str]], combined_board: [[str]]) -> (int, int):
+def get_hint_value_coord(hint: Move, combined_board: [[str]]) -> (int, int):
     """
     Поиск лучшей позиции для вывода ценности подсказки
     Выбирается одна из 10 клеток по заданным приоритетам
     Если все 10 клеток заняты, возвращается позиция начала подсказки
-    :param hint: подсказка в виде двумерного символьного массива
+    :param hint: ход подсказки
     :param combined_board: объединение доски, подсказок и их ценностей
     в общий двумерный символьный массив
     :return: координаты в формате y, x
@@ -93,9 +80,9 @@ def get_hint_value_coord(hint: [[str]], combined_board: [[str]]) -> (int, int):
         top_block = True
     if xs == 0:
         left_block = True
-    if ye == len(hint) - 1:
+    if ye == len(combined_board) - 1:
         bot_block = True
-    if xe == len(hint) - 1:
+    if xe == len(combined_board[0]) - 1:
         right_block = True
 
     # приоритеты подсказок: 0 - максимальный, 9 - минимальный
@@ -204,4 +191,4 @@ def get_hint_value_coord(hint: [[str]], combined_board: [[str]]) -> (int, int):
         if not bot_block and not right_block:
             if not combined_board[ye + 1][xe + 1]:
                 return ye + 1, xe + 1
-    return xs, ys
+    return ys, xs
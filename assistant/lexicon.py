@@ -0,0 +1,294 @@
+import mmap
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from assistant.cross_checks import ALL_LETTERS_MASK
+from assistant.gaddag import ALPHABET, LETTER_CODES, get_file_digest, \
+    load_gaddag
+from assistant.read_files import read_txt_to_tuple
+
+# кодировка слов в упакованном словаре: одна буква - один байт
+WORDS_ENCODING = 'cp1251'
+# расширение файла с упакованным словарем (рядом с .txt словарем)
+WORDS_SUFFIX = '.words'
+
+# заголовок файла: сигнатура, версия формата, sha1 исходного словаря,
+# кол-во слов, длина самого длинного слова
+# (дополнен до 40 байт, чтобы следующий за ним массив uint64 был выровнен)
+_HEADER = struct.Struct('<4sH20sII6x')
+_MAGIC = b'WRDS'
+_VERSION = 2
+# кол-во групп слов одной длины: по одной на каждую первую букву + пустая
+_GROUPS_PER_LENGTH = len(ALPHABET) + 1
+
+
+# author: Pavel
+class Lexicon:
+    """
+    Словарь, загружаемый в память один раз при старте
+    и разделяемый всеми поисками подсказок
+    Слова читаются из упакованного словаря, отображенного в память (mmap):
+    несколько процессов используют одну копию словаря в кеше страниц,
+    а слово - это срез отображенного буфера без построения строк.
+    Для каждого слова в том же файле хранятся вектор кол-ва букв
+    и маска присутствующих букв, по которым весь словарь
+    отфильтровывается под буквы игрока одной векторной операцией
+    """
+
+    def __init__(self, path: Path):
+        """
+        Загрузка словаря
+        :param path: путь к текстовому словарю (одно слово в строке)
+        """
+
+        self.path = Path(path)
+        # GADDAG для генерации ходов
+        # читается из собранного заранее файла рядом со словарем
+        self.gaddag = load_gaddag(self.path)
+
+        # упакованный словарь пересобирается, если его нет
+        # или он собран из другой версии текстового словаря
+        words_path = get_words_path(self.path)
+        digest = get_file_digest(self.path)
+        content = None
+        if not is_words_file_fresh(words_path, digest):
+            content = build_words_file(self.path, digest)
+        if is_words_file_fresh(words_path, digest):
+            with open(Path(Path.cwd() / words_path), 'rb') as file:
+                self._mapped = mmap.mmap(file.fileno(), 0,
+                                         access=mmap.ACCESS_READ)
+        else:
+            # если записать файл не удалось, работаем с копией в памяти
+            self._mapped = content
+        _, self.words_amount, self.max_word_length = \
+            _read_header(self._mapped[:_HEADER.size])
+
+        # массивы - представления отображенного буфера, без копирования
+        n = self.words_amount
+        groups = (self.max_word_length + 1) * _GROUPS_PER_LENGTH
+        offset = _HEADER.size
+        # маски присутствующих в слове букв (бит буквы - код буквы - 1)
+        self.masks = np.frombuffer(self._mapped, dtype='<u8', count=n,
+                                   offset=offset)
+        offset += n * 8
+        # смещения слов в области слов (+ конец последнего слова)
+        self._word_offsets = np.frombuffer(self._mapped, dtype='<u4',
+                                           count=n + 1, offset=offset)
+        offset += (n + 1) * 4
+        # группа (длина, код первой буквы) - слова с индексами
+        # group_starts[k]:group_starts[k + 1]
+        self._group_starts = np.frombuffer(self._mapped, dtype='<u4',
+                                           count=groups + 1, offset=offset)
+        offset += (groups + 1) * 4
+        # кол-во каждой буквы алфавита в слове
+        self.counts = np.frombuffer(self._mapped, dtype=np.uint8,
+                                    count=n * len(ALPHABET),
+                                    offset=offset).reshape(n, len(ALPHABET))
+        offset += n * len(ALPHABET)
+        self._data = memoryview(self._mapped)[offset:]
+
+    def get_word(self, index: int) -> memoryview:
+        """
+        Слово по его индексу в упакованном словаре
+        :param index: индекс слова
+        :return: срез отображенного буфера (без копирования)
+        """
+
+        return self._data[self._word_offsets[index]:
+                          self._word_offsets[index + 1]]
+
+    def get_compilable_words(self, letters: dict,
+                             max_length: int = None) -> np.ndarray:
+        """
+        Отбор слов, которые можно составить из переданных букв
+        (например, букв игрока и букв на линии доски)
+        Сначала по маскам отсекаются слова с буквами, которых нет вовсе,
+        затем оставшиеся сравниваются по векторам кол-ва букв
+        :param letters: доступные буквы
+        :param max_length: максимальная длина слова, None - любая
+        :return: индексы подходящих слов по возрастанию
+        """
+
+        rack = get_letters_vector(letters)
+        absent = np.uint64(ALL_LETTERS_MASK & ~get_letters_mask(letters))
+
+        # слова отсортированы по длине - короткие идут первыми
+        end = self.words_amount
+        if max_length is not None and max_length < self.max_word_length:
+            end = self._group_starts[(max(max_length, 0) + 1) *
+                                     _GROUPS_PER_LENGTH]
+
+        candidates = np.flatnonzero((self.masks[:end] & absent) == 0)
+        fits = np.all(self.counts[candidates] <= rack, axis=1)
+        return candidates[fits]
+
+    def __iter__(self):
+        for index in range(self.words_amount):
+            yield decode_word(self.get_word(index))
+
+    def __len__(self) -> int:
+        return self.words_amount
+
+
+# author: Pavel
+def get_letters_vector(letters: dict) -> np.ndarray:
+    """
+    Вектор кол-ва букв по кодам алфавита
+    :param letters: буквы и их кол-во
+    :return: массив uint8 длины алфавита
+    """
+
+    vector = np.zeros(len(ALPHABET), dtype=np.uint8)
+    for letter, amount in letters.items():
+        if letter in LETTER_CODES and amount > 0:
+            vector[LETTER_CODES[letter] - 1] = min(amount, 255)
+    return vector
+
+
+# author: Pavel
+def get_letters_mask(letters) -> int:
+    """
+    Маска присутствующих букв: бит буквы - ее код в алфавите - 1
+    :param letters: буквы (строка или словарь с кол-вом букв)
+    :return: маска
+    """
+
+    if isinstance(letters, dict):
+        letters = [letter for letter, amount in letters.items() if amount > 0]
+    mask = 0
+    for letter in letters:
+        if letter in LETTER_CODES:
+            mask |= 1 << (LETTER_CODES[letter] - 1)
+    return mask
+
+
+# author: Pavel
+def decode_word(record: memoryview) -> str:
+    """
+    Перевод записи упакованного словаря в строку
+    :param record: срез буфера со словом
+    :return: слово
+    """
+
+    return bytes(record).decode(WORDS_ENCODING)
+
+
+# author: Pavel
+def get_words_path(dictionary_path: Path) -> Path:
+    """
+    Путь к упакованному словарю рядом с текстовым словарем
+    :param dictionary_path: путь к текстовому словарю
+    :return: путь к файлу .words
+    """
+
+    return Path(dictionary_path).with_suffix(WORDS_SUFFIX)
+
+
+# author: Pavel
+def pack_words(words: (str,)) -> (bytes, int, int):
+    """
+    Упаковка слов в таблицу, отсортированную по длине и первой букве
+    Внутри группы сохраняется исходный порядок слов.
+    Слова с символами вне алфавита игры пропускаются
+    :param words: слова
+    :return: содержимое файла после заголовка, кол-во слов, макс. длина
+    """
+
+    words = [word for word in words
+             if word and all(letter in LETTER_CODES for letter in word)]
+    words.sort(key=lambda w: (len(w), LETTER_CODES[w[0]]))
+    max_length = max(map(len, words), default=0)
+
+    masks = np.zeros(len(words), dtype='<u8')
+    word_offsets = np.zeros(len(words) + 1, dtype='<u4')
+    counts = np.zeros((len(words), len(ALPHABET)), dtype=np.uint8)
+    groups = (max_length + 1) * _GROUPS_PER_LENGTH
+    group_starts = np.zeros(groups + 1, dtype='<u4')
+    data = bytearray()
+
+    word_index = 0
+    for group in range(groups):
+        group_starts[group] = word_index
+        length, code = divmod(group, _GROUPS_PER_LENGTH)
+        while word_index < len(words) and \
+                len(words[word_index]) == length and \
+                LETTER_CODES[words[word_index][0]] == code:
+            word = words[word_index]
+            word_offsets[word_index] = len(data)
+            data += word.encode(WORDS_ENCODING)
+            masks[word_index] = get_letters_mask(word)
+            for letter in word:
+                counts[word_index, LETTER_CODES[letter] - 1] += 1
+            word_index += 1
+    group_starts[groups] = word_index
+    word_offsets[len(words)] = len(data)
+
+    table = masks.tobytes() + word_offsets.tobytes() + \
+        group_starts.tobytes() + counts.tobytes() + bytes(data)
+    return table, len(words), max_length
+
+
+# author: Pavel
+def build_words_file(dictionary_path: Path,
+                     source_digest: bytes = None) -> bytes:
+    """
+    Упаковка текстового словаря в файл .words рядом с ним
+    Если записать файл не удалось (нет прав), содержимое просто возвращается
+    :param dictionary_path: путь к текстовому словарю
+    :param source_digest: sha1 словаря, если уже посчитан
+    :return: содержимое файла
+    """
+
+    if source_digest is None:
+        source_digest = get_file_digest(dictionary_path)
+    table, words_amount, max_length = \
+        pack_words(read_txt_to_tuple(dictionary_path))
+    content = _HEADER.pack(_MAGIC, _VERSION, source_digest,
+                           words_amount, max_length) + table
+    try:
+        with open(Path(Path.cwd() / get_words_path(dictionary_path)),
+                  'wb') as file:
+            file.write(content)
+    except OSError:
+        pass
+    return content
+
+
+# author: Pavel
+def is_words_file_fresh(path: Path, source_digest: bytes) -> bool:
+    """
+    Проверяет, что упакованный словарь существует
+    и собран из текущей версии текстового словаря
+    :param path: путь к файлу .words
+    :param source_digest: sha1 текстового словаря
+    :return: true - файл можно использовать
+    """
+
+    return Path(Path.cwd() / path).exists() and \
+        read_words_header(path)[0] == source_digest
+
+
+# author: Pavel
+def read_words_header(path: Path) -> (bytes, int, int):
+    """
+    Чтение заголовка упакованного словаря
+    :param path: путь к файлу .words
+    :return: sha1 исходного словаря, кол-во слов, макс. длина слова;
+    для поврежденного файла или файла другой версии sha1 равен None
+    """
+
+    with open(Path(Path.cwd() / path), 'rb') as file:
+        return _read_header(file.read(_HEADER.size))
+
+
+# author: Pavel
+def _read_header(header: bytes) -> (bytes, int, int):
+    if len(header) != _HEADER.size:
+        return None, 0, 0
+    magic, version, digest, words_amount, max_length = \
+        _HEADER.unpack(header)
+    if magic != _MAGIC or version != _VERSION:
+        return None, 0, 0
+    return digest, words_amount, max_length
@@ -0,0 +1,106 @@
+from assistant.cross_checks import ACROSS
+
+
+# author: Pavel
+class Move:
+    """
+    Ход (подсказка): слово, его положение на доске и ценность
+    Вместо доски с одним словом хранится только начало слова,
+    направление и маска новых фишек: бит i установлен,
+    если i-я буква слова ставится на пустую клетку
+    """
+
+    __slots__ = ('word', 'row', 'col', 'direction', 'score', 'placed')
+
+    def __init__(self, word: str, row: int, col: int, direction: int,
+                 score: int = 0, placed: int = 0):
+        """
+        :param word: слово целиком (вместе с буквами, уже стоящими на доске)
+        :param row: индекс строки первой буквы
+        :param col: индекс столбца первой буквы
+        :param direction: ACROSS - по горизонтали, DOWN - по вертикали
+        :param score: ценность хода
+        :param placed: маска новых фишек
+        """
+
+        self.word = word
+        self.row = row
+        self.col = col
+        self.direction = direction
+        self.score = score
+        self.placed = placed
+
+    @property
+    def line_index(self) -> int:
+        """
+        Индекс линии хода: строки (ACROSS) или столбца (DOWN)
+        """
+
+        return self.row if self.direction == ACROSS else self.col
+
+    @property
+    def start_index(self) -> int:
+        """
+        Индекс первой буквы в линии хода
+        """
+
+        return self.col if self.direction == ACROSS else self.row
+
+    def get_cells(self) -> [(int, int, str)]:
+        """
+        Клетки всех букв слова
+        :return: массив (y, x, буква)
+        """
+
+        dy, dx = (0, 1) if self.direction == ACROSS else (1, 0)
+        return [(self.row + i * dy, self.col + i * dx, letter)
+                for i, letter in enumerate(self.word)]
+
+    def get_placed_cells(self) -> [(int, int, str)]:
+        """
+        Клетки новых фишек хода
+        :return: массив (y, x, буква)
+        """
+
+        return [cell for i, cell in enumerate(self.get_cells())
+                if self.placed >> i & 1]
+
+    def get_end(self) -> (int, int):
+        """
+        Координаты последней буквы слова в формате y, x
+        """
+
+        if self.direction == ACROSS:
+            return self.row, self.col + len(self.word) - 1
+        return self.row + len(self.word) - 1, self.col
+
+    def intersects(self, other: 'Move') -> bool:
+        """
+        Проверка на пересечение двух ходов:
+        оба ставят новую фишку в одну и ту же клетку
+        """
+
+        cells = {(y, x) for y, x, _ in self.get_placed_cells()}
+        return any((y, x) in cells for y, x, _ in other.get_placed_cells())
+
+    def __repr__(self) -> str:
+        return 'Move({!r}, {}, {}, {}, {}, {})'.format(
+            self.word, self.row, self.col, self.direction, self.score,
+            bin(self.placed))
+
+
+# author: Pavel
+def get_placed_mask(line: [str], start: int, length: int) -> int:
+    """
+    Маска новых фишек слова, выложенного в линию доски
+    :param line: линия доски в виде массива символов
+    :param start: индекс начала слова в линии
+    :param length: длина слова
+    :return: маска, бит i - i-я буква слова ставится на пустую клетку
+    """
+
+    mask = 0
+    for i in range(length):
+        if not line[start + i]:
+            mask |= 1 << i
+    return mask
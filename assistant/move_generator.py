@@ -0,0 +1,124 @@
+from collections import Counter
+
+from assistant.cross_checks import NO_CROSS_WORD
+from assistant.gaddag import ALPHABET, LETTER_CODES, SEPARATOR, Gaddag
+
+
+# author: Pavel
+def get_row_anchors(row: [str], cross_scores: [int]) -> [int]:
+    """
+    Находит якоря строки - пустые клетки, соседние с фишкой
+    по горизонтали или по вертикали
+    Любой допустимый ход в строке проходит хотя бы через один якорь
+    :param row: строка доски в виде массива символов
+    :param cross_scores: частичные ценности перпендикулярных слов клеток
+    строки (NO_CROSS_WORD - соседей по вертикали нет)
+    :return: индексы якорей по возрастанию
+    """
+
+    anchors = []
+    for i in range(len(row)):
+        if not row[i]:
+            if (i > 0 and row[i - 1]) or (i < len(row) - 1 and row[i + 1]) \
+                    or cross_scores[i] != NO_CROSS_WORD:
+                anchors.append(i)
+    return anchors
+
+
+# author: Pavel
+def get_row_moves(row: [str], letters: Counter, gaddag: Gaddag,
+                  masks: [int], cross_scores: [int],
+                  anchors: [int] = None) -> [(str, int)]:
+    """
+    Генерация всех слов, которые можно выложить в строку
+    Слово растет от якоря по GADDAG: сначала влево (перевернутое начало
+    слова), затем, после разделителя, вправо от якоря.
+    Обходятся только те части слов, которые есть в словаре
+    и которые можно собрать из букв игрока и букв на доске.
+    Буква ставится в пустую клетку, только если ее бит есть в маске
+    перекрестной проверки клетки
+    :param row: строка доски в виде массива символов
+    :param letters: буквы, имеющиеся у игрока
+    :param gaddag: GADDAG словаря
+    :param masks: маски перекрестных проверок клеток строки
+    :param cross_scores: частичные ценности перпендикулярных слов
+    :param anchors: якоря строки, если не переданы - ищутся по строке
+    :return: массив пар (слово, индекс начала слова в строке)
+    """
+
+    moves = []
+    row_length = len(row)
+
+    # буквы игрока по кодам букв
+    rack = [0] * (len(ALPHABET) + 1)
+    for letter, amount in letters.items():
+        if letter in LETTER_CODES and amount > 0:
+            rack[LETTER_CODES[letter]] = amount
+
+    arc_offsets = gaddag.arc_offsets
+    arc_labels = gaddag.arc_labels
+    arc_targets = gaddag.arc_targets
+    terminals = gaddag.terminals
+
+    # текущий якорь и самая левая клетка, доступная из него
+    anchor = 0
+    left_limit = 0
+
+    def gen(square: int, word: str, node: int):
+        cell = row[square]
+        # если в клетке фишка - идем по дуге с ее буквой
+        if cell:
+            code = LETTER_CODES.get(cell)
+            if code is not None:
+                child = gaddag.child(node, code)
+                if child != -1:
+                    go_on(square, cell, word, child)
+        # на свободную клетку ставим любую подходящую букву игрока,
+        # прошедшую перекрестную проверку
+        else:
+            mask = masks[square]
+            for arc in range(arc_offsets[node], arc_offsets[node + 1]):
+                code = arc_labels[arc]
+                if code != SEPARATOR and rack[code] > 0 and \
+                        mask & (1 << (code - 1)):
+                    rack[code] -= 1
+                    go_on(square, ALPHABET[code - 1], word,
+                          arc_targets[arc])
+                    rack[code] += 1
+
+    def go_on(square: int, letter: str, word: str, node: int):
+        # движение влево от якоря (включая сам якорь)
+        if square <= anchor:
+            word = letter + word
+            left_free = square == 0 or not row[square - 1]
+            right_free = anchor == row_length - 1 or not row[anchor + 1]
+            if terminals[node] and left_free and right_free:
+                moves.append((word, square))
+            if square - 1 >= left_limit:
+                gen(square - 1, word, node)
+            # переход через разделитель: дальше растем вправо от якоря
+            if left_free and anchor + 1 < row_length:
+                separator = gaddag.child(node, SEPARATOR)
+                if separator != -1:
+                    gen(anchor + 1, word, separator)
+        # движение вправо от якоря
+        else:
+            word = word + letter
+            if terminals[node] and \
+                    (square == row_length - 1 or not row[square + 1]):
+                moves.append((word, square - len(word) + 1))
+            if square + 1 < row_length:
+                gen(square + 1, word, node)
+
+    if anchors is None:
+        anchors = get_row_anchors(row, cross_scores)
+
+    previous_anchor = -1
+    for anchor in anchors:
+        # влево не заходим на предыдущий якорь,
+        # чтобы не получить одно и то же слово дважды
+        left_limit = previous_anchor + 1
+        gen(anchor, '', gaddag.root)
+        previous_anchor = anchor
+
+    return moves
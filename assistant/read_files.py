@@ -26,3 +26,17 @@ def read_json_to_list(json_path: Path) -> [[str]]:
     with open(file=Path(Path.cwd() / json_path), mode='r',
               encoding='utf-8') as file:
         return list(json.load(file))
+
+
+# author: Pavel
+def read_txt_to_tuple(txt_path: Path) -> (str,):
+    """
+    Считывает текстовый файл построчно в кортеж строк
+    Пустые строки пропускаются, символы переноса строки отбрасываются
+    :param txt_path: имя текстового файла
+    :return: кортеж строк
+    """
+
+    with open(file=Path(Path.cwd() / txt_path), mode='r',
+              encoding='utf-8') as file:
+        return tuple(line.rstrip('\n') for line in file if line.strip())
@@ -0,0 +1,181 @@
+import numpy as np
+
+from assistant.cross_checks import NO_CROSS_WORD
+from assistant.lexicon import WORDS_ENCODING
+
+# премия за то, что игрок выложил разом все 7 букв
+ALL_LETTERS_BONUS = 15
+# сколько букв нужно выложить для премии
+ALL_LETTERS_AMOUNT = 7
+
+# разметка ценности полей доски:
+# 00 - обычное поле
+# x2 - *2 за букву
+# x3 - *3 за букву
+# X2 - *2 за слово
+# X3 - *3 за слово
+# ST - стартовое поле
+_LETTER_BONUSES = {'x2': 2, 'x3': 3}
+_WORD_BONUSES = {'X2': 2, 'X3': 3}
+
+
+# author: Pavel
+def compile_bonuses(board_bonuses: [[str]]) -> (np.ndarray, np.ndarray):
+    """
+    Перевод разметки бонусов доски в числовые множители
+    :param board_bonuses: бонусы доски в виде матрицы строк
+    :return: множители за букву и множители за слово
+    (матрицы int8 размера доски, 1 - бонуса нет)
+    """
+
+    letter_multipliers = np.array(
+        [[_LETTER_BONUSES.get(bonus, 1) for bonus in row]
+         for row in board_bonuses], dtype=np.int8)
+    word_multipliers = np.array(
+        [[_WORD_BONUSES.get(bonus, 1) for bonus in row]
+         for row in board_bonuses], dtype=np.int8)
+    return letter_multipliers, word_multipliers
+
+
+# author: Pavel
+def compile_letters_values(letters_values: dict) -> np.ndarray:
+    """
+    Таблица ценности букв по их байтам в кодировке упакованного словаря
+    :param letters_values: словарь с ценностью букв
+    :return: массив int32 из 256 элементов (0 для прочих байтов)
+    """
+
+    table = np.zeros(256, dtype=np.int32)
+    for letter, value in letters_values.items():
+        table[letter.encode(WORDS_ENCODING)[0]] = value
+    return table
+
+
+# author: Pavel
+def score_moves(words: [str], starts: [int], line: [str],
+                letter_multipliers: np.ndarray,
+                word_multipliers: np.ndarray,
+                letters_values: np.ndarray,
+                cross_scores: [int] = None) -> np.ndarray:
+    """
+    Ценность сразу всех слов, выложенных в одну линию доски
+    Правила те же, что в evaluate_word: бонусы действуют только
+    под новыми буквами, бонусы клетки действуют и на перпендикулярное
+    слово, за 7 новых букв - премия.
+    Все буквы всех слов обрабатываются одним массивом,
+    а суммы по уже стоящим фишкам и бонусам за слово
+    берутся из префиксных сумм вдоль линии
+    :param words: слова
+    :param starts: индексы начала слов в линии
+    :param line: линия доски в виде массива символов
+    :param letter_multipliers: множители за букву клеток линии
+    :param word_multipliers: множители за слово клеток линии
+    :param letters_values: ценность букв по байтам (compile_letters_values)
+    :param cross_scores: частичные ценности перпендикулярных слов клеток
+    линии (NO_CROSS_WORD - перпендикулярного слова нет)
+    :return: массив int64 с ценностью каждого слова
+    """
+
+    if not words:
+        return np.zeros(0, dtype=np.int64)
+    return LineScoring(line, letter_multipliers, word_multipliers,
+                       letters_values, cross_scores).score(words, starts)
+
+
+# author: Pavel
+class LineScoring:
+    """
+    Подготовленная к подсчету ценности слов линия доски (см. score_moves)
+    Все, что зависит только от линии (уже стоящие фишки, действующие
+    бонусы и префиксные суммы), считается один раз, поэтому одну линию
+    можно оценивать для разных букв игрока без повторной подготовки
+    """
+
+    __slots__ = ('letters_values', 'occupied', 'letter_multipliers',
+                 'word_multipliers', 'tiles_sums', 'occupied_sums',
+                 'doubles_sums', 'triples_sums', 'cross_scores')
+
+    def __init__(self, line: [str], letter_multipliers: np.ndarray,
+                 word_multipliers: np.ndarray, letters_values: np.ndarray,
+                 cross_scores: [int] = None):
+        """
+        :param line: линия доски в виде массива символов
+        :param letter_multipliers: множители за букву клеток линии
+        :param word_multipliers: множители за слово клеток линии
+        :param letters_values: ценность букв по байтам
+        :param cross_scores: частичные ценности перпендикулярных слов
+        клеток линии (None - перпендикулярные слова не учитываются)
+        """
+
+        self.letters_values = letters_values
+        # уже стоящие фишки линии
+        self.occupied = np.array([bool(cell) for cell in line])
+        tiles = np.array([cell.encode(WORDS_ENCODING)[0] if cell else 0
+                          for cell in line], dtype=np.uint8)
+        # бонусы использованной клетки больше не действуют
+        self.letter_multipliers = np.where(self.occupied, 1,
+                                           letter_multipliers)
+        self.word_multipliers = np.where(self.occupied, 1, word_multipliers)
+
+        # префиксные суммы: ценность фишек, кол-во фишек,
+        # кол-во свободных клеток X2 и X3
+        def prefix(values: np.ndarray) -> np.ndarray:
+            return np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+
+        self.tiles_sums = prefix(np.where(self.occupied,
+                                          letters_values[tiles], 0))
+        self.occupied_sums = prefix(self.occupied)
+        self.doubles_sums = prefix(self.word_multipliers == 2)
+        self.triples_sums = prefix(self.word_multipliers == 3)
+        self.cross_scores = None if cross_scores is None else \
+            np.asarray(cross_scores, dtype=np.int64)
+
+    def score(self, words: [str], starts: [int]) -> np.ndarray:
+        """
+        Ценность слов линии
+        :param words: слова
+        :param starts: индексы начала слов в линии
+        :return: массив int64 с ценностью каждого слова
+        """
+
+        if not words:
+            return np.zeros(0, dtype=np.int64)
+
+        starts = np.asarray(starts, dtype=np.int64)
+        lengths = np.fromiter(map(len, words), dtype=np.int64,
+                              count=len(words))
+        ends = starts + lengths
+
+        # все буквы всех слов подряд: номер слова и клетка линии
+        # каждой буквы
+        letters = np.frombuffer(''.join(words).encode(WORDS_ENCODING),
+                                dtype=np.uint8)
+        word_ids = np.repeat(np.arange(len(words)), lengths)
+        first_letters = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        squares = starts[word_ids] + np.arange(len(letters)) - first_letters
+
+        # новые буквы с бонусами за букву
+        new = ~self.occupied[squares]
+        new_values = np.where(new, self.letters_values[letters] *
+                              self.letter_multipliers[squares], 0)
+
+        value = np.bincount(word_ids, weights=new_values,
+                            minlength=len(words)).astype(np.int64)
+        value += self.tiles_sums[ends] - self.tiles_sums[starts]
+        value *= 2 ** (self.doubles_sums[ends] - self.doubles_sums[starts])
+        value *= 3 ** (self.triples_sums[ends] - self.triples_sums[starts])
+
+        # перпендикулярные слова, образованные новыми буквами
+        if self.cross_scores is not None:
+            cross_scores = self.cross_scores[squares]
+            crossed = new & (cross_scores != NO_CROSS_WORD)
+            cross_values = np.where(crossed, (cross_scores + new_values) *
+                                    self.word_multipliers[squares], 0)
+            value += np.bincount(word_ids, weights=cross_values,
+                                 minlength=len(words)).astype(np.int64)
+
+        new_amount = lengths - (self.occupied_sums[ends] -
+                                self.occupied_sums[starts])
+        value += np.where(new_amount == ALL_LETTERS_AMOUNT,
+                          ALL_LETTERS_BONUS, 0)
+        return value
@@ -3,7 +3,15 @@ from pathlib import Path
 
 import numpy as np
 
+from assistant.cross_checks import ACROSS, DOWN, CrossChecks
+from assistant.gaddag import ALPHABET, LETTER_CODES
+from assistant.lexicon import Lexicon, decode_word, get_letters_vector
+from assistant.move import Move, get_placed_mask
+from assistant.move_generator import get_row_anchors, get_row_moves
 from assistant.read_files import read_json_to_list, read_json_to_dict
+from assistant.scoring import ALL_LETTERS_AMOUNT, LineScoring, \
+    compile_bonuses, compile_letters_values, score_moves
+from assistant.top_hints import TopNonOverlappingHints
 
 # Пути к json файлам:
 #
@@ -23,264 +31,344 @@ LETTERS_VALUES = read_json_to_dict(LETTERS_VALUES_FILE_PATH)
 LETTERS_AMOUNT = read_json_to_dict(LETTERS_AMOUNT_FILE_PATH)
 # список бонусов доски в виде матрицы
 BOARD_BONUSES = read_json_to_list(BOARD_BONUSES_FILE_PATH)
+# бонусы доски в виде множителей за букву и за слово
+LETTER_MULTIPLIERS, WORD_MULTIPLIERS = compile_bonuses(BOARD_BONUSES)
+# ценность букв по байтам упакованного словаря
+LETTERS_BYTE_VALUES = compile_letters_values(LETTERS_VALUES)
+# основной словарь, загружается один раз при старте
+LEXICON = Lexicon(DICTIONARY_FILE_PATH)
 
 
 # author: Pavel
-def hints_intersect(board: [[str]], hint1: [[str]], hint2: [[str]]) -> bool:
+def get_n_hints(board: [[str]], letters: Counter, n: int,
+                lexicon: Lexicon = LEXICON,
+                analysis: 'BoardAnalysis' = None,
+                check_cancelled=None) -> [Move]:
     """
-    Проверка на пересечение двух подсказок
+    Поиск n лучших непересекающихся подсказок
+    Среди вертикальных и горизонтальных выбирается n лучших
     :param board: доска в виде двумерного символьного массива
-    :param hint1: первая подсказка
-    :param hint2: вторая подсказка
+    :param letters: буквы, имеющиеся у игрока
+    :param n: кол-во необходимых подсказок
+    :param lexicon: словарь, по которому ведется поиск
+    :param analysis: разбор этой доски (см. BoardAnalysis), с ним
+    при поиске для разных букв доска заново не разбирается
+    :param check_cancelled: функция без аргументов, вызываемая
+    перед каждой линией доски; чтобы прервать поиск, она выбрасывает
+    исключение, которое выходит из get_n_hints
+    :return: n лучших непересекающихся ходов по убыванию ценности
+    (может быть меньше n)
     """
 
-    # если на обоих подсказках в одной и той же клетке есть буквы
-    # и на доске эта буква еще не стоит
-    # то подсказки пересекаются
-    for y in range(len(hint1)):
-        for x in range(len(hint1[0])):
-            if hint1[y][x] and hint2[y][x] and not board[y][x]:
-                return True
-    return False
+    # подсказки не нужны - доска не разбирается
+    if n <= 0:
+        return []
 
+    if analysis is None:
+        analysis = BoardAnalysis(board, lexicon)
 
-# author: Pavel
-def row_hints_intersect(word1: [str], xs1: int, ys1: int,
-                        word2: [str], xs2: int, ys2: int) -> bool:
-    """
-    Проверка на пересечение двух слов, расположенных горизонтально
-    """
+    # для пустой доски
+    if analysis.is_empty:
+        move = get_hint_for_empty_board(analysis.board, letters,
+                                        analysis.lexicon)
+        return [move] if move is not None else []
 
-    # если оба слова в одной строке
-    if ys1 == ys2:
-        xe1 = xs1 + len(word1) - 1  # индекс конца слова 1
-        xe2 = xs2 + len(word2) - 1  # индекс конца слова 2
-        # если начало или конец слова 1 находится внутри слова 2
-        # или то же для слова 2
-        # то они пересекаются
-        if xs2 <= xs1 <= xe2 or xs2 <= xe1 <= xe2 \
-                or xs1 <= xs2 <= xe1 or xs1 <= xe2 <= xe1:
-            return True
-        else:
-            return False
-    # если слова в разных строках - они не пересекаются
-    else:
-        return False
+    hints = []
+    for direction in (ACROSS, DOWN):
+        top_hints = TopNonOverlappingHints(n)
+        for board_line in analysis.get_lines(direction):
+            if check_cancelled is not None:
+                check_cancelled()
+            candidates = get_line_candidates(board_line, letters,
+                                             analysis.lexicon)
+            _add_line_hints(top_hints, candidates, board_line)
+        hints.append(top_hints.get_hints())
+
+    return _merge_hints(hints[ACROSS], hints[DOWN], n)
 
 
 # author: Pavel
-def get_n_hints(board: [[str]], letters: Counter, n: int) -> ([[[str]]], [int]):
+def get_n_row_hints(board: [[str]], letters: Counter, n: int,
+                    lexicon: Lexicon = LEXICON,
+                    cross_checks: CrossChecks = None,
+                    direction: int = ACROSS) -> [Move]:
     """
-    Поиск n лучших непересекающихся подсказок
-    Среди вертикальных и горизонтальных выбирается n лучших
+    Поиск n лучших непересекающихся подсказок одного направления
     :param board: доска в виде двумерного символьного массива
     :param letters: буквы, имеющиеся у игрока
     :param n: кол-во необходимых подсказок
-    :return: массив досок с n лучшими непересекающимися подсказками
+    :param lexicon: словарь, по которому ведется поиск
+    :param cross_checks: перекрестные проверки доски,
+    если не переданы - считаются по board
+    :param direction: ACROSS - горизонтальные подсказки,
+    DOWN - вертикальные
+    :return: не больше n лучших непересекающихся ходов
+    по убыванию ценности
     """
 
-    # для пустой доски
-    if is_board_empty(board):
-        result = get_hint_for_empty_board(board, letters)
-        result_hints = [result[0]]
-        result_values = [result[1]]
-        return result_hints, result_values
+    if n <= 0:
+        return []
 
-    x_hints, x_values = get_n_row_hints(board, letters, n)
-    y_hints, y_values = get_n_row_hints(transpose_board(board), letters, n)
-    for i in range(len(y_hints)):
-        y_hints[i] = transpose_board(y_hints[i])
+    # n лучших непересекающихся подсказок
+    top_hints = TopNonOverlappingHints(n)
 
-    best_hints = []  # массив n лучших подсказок
-    best_hints_values = []  # массив стоимостей n лучших подсказок
+    # разбираются только линии нужного направления
+    analysis = BoardAnalysis(board, lexicon, cross_checks, (direction,))
+    for board_line in analysis.get_lines(direction):
+        candidates = get_line_candidates(board_line, letters, lexicon)
+        _add_line_hints(top_hints, candidates, board_line)
+
+    return top_hints.get_hints()
 
-    # объединение горизонтальных и вертикальных подсказок
-    # сортировка по стоимости
-    xi = 0  # индекс вертикальных подсказок
-    yi = 0  # индекс горизонтальных подсказок
-    while xi != n or yi != n:
-        # обработка случая выхода за пределы массива гориз. подсказок
-        if xi != n:
-            x_value = x_values[xi]
-        else:
-            x_value = -1
 
-        # обработка случая выхода за пределы массива верт. подсказок
-        if yi != n:
-            y_value = y_values[yi]
+# author: Pavel
+def get_line_candidates(board_line: 'BoardLine', letters: Counter,
+                        lexicon: Lexicon = LEXICON) -> [(str, int, int)]:
+    """
+    Все слова, которые можно выложить в линию доски, вместе с ценностью
+    :param board_line: разобранная линия доски (см. BoardAnalysis)
+    :param letters: буквы, имеющиеся у игрока
+    :param lexicon: словарь, по которому ведется поиск
+    :return: массив (слово, индекс начала слова в линии, ценность)
+    в порядке генерации
+    """
+
+    if not board_line.anchors:
+        return []
+    # если для линии уже собраны ходы при любых буквах,
+    # из них отбираются ходы, собираемые из букв игрока
+    # (порядок тот же, что и при обходе словаря)
+    candidates = board_line.candidates
+    if candidates is not None and \
+            sum(letters.values()) <= ALL_LETTERS_AMOUNT:
+        words, starts, values, counts = candidates
+        rack = get_letters_vector(letters)
+        fits = np.flatnonzero((counts <= rack).all(axis=1))
+        return [(words[i], starts[i], values[i]) for i in fits.tolist()]
+    # генерация слов, которые можно выложить в линию:
+    # обходятся только префиксы словаря, собираемые из букв игрока
+    # и букв линии и прошедшие перекрестные проверки
+    moves = get_row_moves(board_line.line, letters, lexicon.gaddag,
+                          board_line.masks, board_line.cross_scores,
+                          board_line.anchors)
+    if not moves:
+        return []
+    # ценность всех слов линии вместе с перпендикулярными словами
+    # считается одним вызовом
+    values = board_line.scoring.score([word for word, _ in moves],
+                                      [start for _, start in moves]).tolist()
+    return [(word, start, value)
+            for (word, start), value in zip(moves, values)]
+
+
+def _add_line_hints(top_hints: TopNonOverlappingHints,
+                    candidates: [(str, int, int)], board_line: 'BoardLine'):
+    direction, index = board_line.direction, board_line.index
+    for word, start, value in candidates:
+        # ход создается, только если он может попасть в n лучших
+        if len(top_hints) == top_hints.n and value <= top_hints.min_value:
+            continue
+        placed = (board_line.free >> start) & ((1 << len(word)) - 1)
+        if direction == ACROSS:
+            move = Move(word, index, start, direction, value, placed)
         else:
-            y_value = -1
+            move = Move(word, start, index, direction, value, placed)
+        # менее ценные подсказки, пересекающие найденную, вытесняются
+        top_hints.add(move)
+
+
+def _merge_hints(x_hints: [Move], y_hints: [Move], n: int) -> [Move]:
+    best_hints = []  # массив n лучших подсказок
 
-        intersection = False  # мешает ли текущая подсказка предыдущим
+    # объединение горизонтальных и вертикальных подсказок
+    # сортировка по стоимости
+    xi = 0  # индекс горизонтальных подсказок
+    yi = 0  # индекс вертикальных подсказок
+    while len(best_hints) < n and (xi < len(x_hints) or yi < len(y_hints)):
         # если гориз. подсказка ценнее
-        if x_value >= y_value:
-            # проверка на пересечение с предыдущими подсказками
-            for hint in best_hints:
-                if hints_intersect(board, x_hints[xi], hint):
-                    intersection = True
-                    break
-            # если пересечений нет - добавляем
-            if not intersection:
-                best_hints.append(x_hints[xi])
-                best_hints_values.append(x_value)
+        if yi == len(y_hints) or \
+                (xi < len(x_hints) and
+                 x_hints[xi].score >= y_hints[yi].score):
+            hint = x_hints[xi]
             xi += 1
         # если верт. подсказка ценнее
         else:
-            # проверка на пересечение с предыдущими подсказками
-            for hint in best_hints:
-                if hints_intersect(board, y_hints[yi], hint):
-                    intersection = True
-                    break
-            # если пересечений нет - добавляем
-            if not intersection:
-                best_hints.append(y_hints[yi])
-                best_hints_values.append(y_value)
+            hint = y_hints[yi]
             yi += 1
 
-    # на выход только подсказки, ценность которых выше 0
-    result_hints = []
-    result_values = []
-    for i in range(n):
-        if best_hints_values[i] > 0:
-            result_hints.append(best_hints[i])
-            result_values.append(best_hints_values[i])
-        else:
+        # на выход только подсказки, ценность которых выше 0
+        if hint.score <= 0:
             break
-    return result_hints, result_values
+        # проверка на пересечение с предыдущими подсказками,
+        # если пересечений нет - добавляем
+        if not any(hint.intersects(best) for best in best_hints):
+            best_hints.append(hint)
+
+    return best_hints
 
 
 # author: Pavel
-def get_n_row_hints(board: [[str]], letters: Counter, n: int) -> \
-        ([[[str]]], [int]):
-    """
-    Поиск n лучших непересекающихся горизонтальных подсказок
-    :param board: доска в виде двумерного символьного массива
-    :param letters: буквы, имеющиеся у игрока
-    :param n: кол-во необходимых подсказок
-    :return: массив из n досок с лучшими непересекающимися подсказками
-    """
+class BoardLine:
+    """
+    Линия доски (строка или столбец) со всем, что нужно для поиска
+    подсказок в ней и не зависит от букв игрока
+    """
+
+    __slots__ = ('direction', 'index', 'line', 'masks', 'cross_scores',
+                 'anchors', 'free', 'candidates', '_scoring')
+
+    def __init__(self, board: [[str]], direction: int, index: int,
+                 cross_checks: CrossChecks):
+        """
+        :param board: доска в виде двумерного символьного массива
+        :param direction: ACROSS - строка, DOWN - столбец
+        :param index: индекс строки или столбца
+        :param cross_checks: перекрестные проверки доски
+        """
+
+        self.direction = direction
+        self.index = index
+        self.line = get_line(board, direction, index)
+        # маски и частичные ценности перекрестных проверок клеток
+        self.masks, self.cross_scores = \
+            cross_checks.get_line_checks(direction, index)
+        # якоря: через них проходит любой ход линии
+        self.anchors = get_row_anchors(self.line, self.cross_scores)
+        # маска свободных клеток, из нее берутся маски новых фишек
+        self.free = get_placed_mask(self.line, 0, len(self.line))
+        # ходы линии при любых буквах игрока (см. prepare_candidates)
+        self.candidates = None
+        self._scoring = None
+
+    def prepare_candidates(self, lexicon: Lexicon = LEXICON):
+        """
+        Собирает все ходы линии, которые можно сделать при любых
+        ALL_LETTERS_AMOUNT буквах игрока, вместе с ценностью и кол-вом
+        выкладываемых букв. После этого поиск для конкретных букв
+        только отбирает ходы, не обходя словарь
+        :param lexicon: словарь, по которому ведется поиск
+        """
+
+        if not self.anchors:
+            return
+        letters = Counter(dict.fromkeys(ALPHABET, ALL_LETTERS_AMOUNT))
+        moves = get_row_moves(self.line, letters, lexicon.gaddag,
+                              self.masks, self.cross_scores, self.anchors)
+        words, starts, rows = [], [], []
+        for word, start in moves:
+            # кол-во каждой буквы, выкладываемой на свободные клетки
+            counts = [0] * len(ALPHABET)
+            for i, letter in enumerate(word):
+                if not self.line[start + i]:
+                    counts[LETTER_CODES[letter] - 1] += 1
+            if sum(counts) <= ALL_LETTERS_AMOUNT:
+                words.append(word)
+                starts.append(start)
+                rows.append(counts)
+        values = self.scoring.score(words, starts).tolist() if words else []
+        counts = np.array(rows, dtype=np.uint8).reshape(-1, len(ALPHABET))
+        # присваивается целиком: поиск в другом потоке видит
+        # либо все ходы линии, либо ни одного
+        self.candidates = (words, starts, values, counts)
+
+    @property
+    def scoring(self) -> LineScoring:
+        """
+        Бонусы и префиксные суммы линии для подсчета ценности слов
+        Готовятся при первом слове, найденном в линии, и дальше
+        используются для любых букв
+        """
+
+        if self._scoring is None:
+            if self.direction == ACROSS:
+                letter_multipliers = LETTER_MULTIPLIERS[self.index, :]
+                word_multipliers = WORD_MULTIPLIERS[self.index, :]
+            else:
+                letter_multipliers = LETTER_MULTIPLIERS[:, self.index]
+                word_multipliers = WORD_MULTIPLIERS[:, self.index]
+            self._scoring = LineScoring(self.line, letter_multipliers,
+                                        word_multipliers,
+                                        LETTERS_BYTE_VALUES,
+                                        self.cross_scores)
+        return self._scoring
+
 
-    # параметры лучших подсказок
-    hints_words = []  # слова
-    hints_values = []  # ценность
-    hints_xs = []  # стартовые X индексы
-    hints_ys = []  # стартовые Y индексы
-
-    # инициализация параметров подсказок
-    for i in range(n):
-        hints_words.append('')
-        hints_values.append(0)
-        hints_xs.append(0)
-        hints_ys.append(0)
-
-    # блокировка заблокированных клеток знаком #
-    marked_board = get_marked_rows(board)
-
-    for i in range(len(marked_board)):
-        with open(DICTIONARY_FILE_PATH, 'r', encoding='utf-8') as dictionary:
-            for dict_line in dictionary:  # Читаем строки из словаря
-                word = dict_line[:-1]  # без \n
-
-                # идем по возможным позициям слова в строке
-                for word_start_index in \
-                        get_word_positions_in_row(word, marked_board[i]):
-                    # то слово, которое пытаемся собрать
-                    # собирается из слова в словаре за вычетом тех букв,
-                    # что уже есть на доске
-                    compiling_word = ''
-                    for j in range(len(word)):
-                        if marked_board[i][j + word_start_index] != word[j]:
-                            compiling_word += word[j]
-
-                    if is_word_compilable(compiling_word, letters):
-                        # считаем его ценность
-                        value = evaluate_word(word, board, i,
-                                              word_start_index)
-                        # если ценность выше, чем у наименее ценного в массиве,
-                        # меняем наименее ценное на найденное
-                        # и затем сортируем
-                        if value >= hints_values[n - 1]:
-                            y_index = i
-                            x_index = word_start_index
-                            window = -1  # индекс вставки новой подсказки
-                            # если найденная подсказка менее ценная, чем n-я
-                            # и пересекает ее - игнорируем найденную.
-                            # если она более ценная, чем n-я,
-                            # вставляем найденную
-                            # и удаляем все менее ценные, пересекающие ее
-                            for ni in range(n):
-                                # если слово не ценнее, чем n-е
-                                if value <= hints_values[ni]:
-                                    # если есть пересечение
-                                    if row_hints_intersect(word,
-                                                           x_index,
-                                                           y_index,
-                                                           hints_words[ni],
-                                                           hints_xs[ni],
-                                                           hints_ys[ni]):
-                                        # игнорируем найденную подсказку
-                                        break
-                                # если слово более ценное
-                                else:
-                                    if window == -1:
-                                        window = ni
-                                    # если hint[ni] пересекается с найденной
-                                    if row_hints_intersect(word,
-                                                           x_index,
-                                                           y_index,
-                                                           hints_words[ni],
-                                                           hints_xs[ni],
-                                                           hints_ys[ni]):
-                                        # то удаляем это слово
-                                        # удаляем смещением массива на 1
-
-                                        for j in range(ni, n - 1):
-                                            jp = j + 1
-                                            hints_words[j] = hints_words[jp]
-                                            hints_values[j] = hints_values[jp]
-                                            hints_xs[j] = hints_xs[jp]
-                                            hints_ys[j] = hints_ys[jp]
-
-                                        # обнуление последнего элемента
-                                        hints_words[n - 1] = ''
-                                        hints_values[n - 1] = 0
-                                        hints_xs[n - 1] = 0
-                                        hints_ys[n - 1] = 0
-
-                            # если подсказка подошла, вставляем ее
-                            if window != -1:
-                                hints_words.insert(window, word)
-                                hints_values.insert(window, value)
-                                hints_xs.insert(window, x_index)
-                                hints_ys.insert(window, y_index)
-                            # если появился элемент n+1 - вырезаем его
-                            if len(hints_words) == n + 1:
-                                hints_words.pop()
-                                hints_values.pop()
-                                hints_xs.pop()
-                                hints_ys.pop()
-
-    # запись n лучших подсказок
-    best_hints = []
-    best_hints_values = []
-    for i in range(n):
-        hint = get_empty_board(len(board), len(board[0]))
-        for j in range(len(hints_words[i])):
-            hint[hints_ys[i]][hints_xs[i] + j] = hints_words[i][j]
-        best_hints.append(hint)
-        best_hints_values.append(hints_values[i])
-
-    return best_hints, best_hints_values
+# author: Pavel
+class BoardAnalysis:
+    """
+    Разбор доски, не зависящий от букв игрока: перекрестные проверки
+    и линии (см. BoardLine)
+    Создается один раз для распознанной доски, после чего поиск
+    подсказок для любых букв только обходит словарь и считает ценность
+    """
+
+    def __init__(self, board: [[str]], lexicon: Lexicon = LEXICON,
+                 cross_checks: CrossChecks = None,
+                 directions: (int, ...) = (ACROSS, DOWN)):
+        """
+        :param board: доска в виде двумерного символьного массива
+        :param lexicon: словарь, по которому ведется поиск
+        :param cross_checks: перекрестные проверки доски,
+        если не переданы - считаются по board
+        :param directions: направления, линии которых разбираются
+        (у остальных направлений линий нет)
+        """
+
+        self.board = [list(row) for row in board]
+        self.lexicon = lexicon
+        self.is_empty = is_board_empty(self.board)
+        self.cross_checks = None
+        # линии [направление][индекс]; на пустой доске ходов
+        # по линиям нет (первый ход ищется отдельно)
+        self.lines = ([], [])
+        if self.is_empty:
+            return
+
+        if cross_checks is None:
+            cross_checks = CrossChecks(self.board, lexicon.gaddag,
+                                       LETTERS_VALUES)
+        self.cross_checks = cross_checks
+        self.lines = tuple(
+            [BoardLine(self.board, direction, i, cross_checks)
+             for i in range(len(self.board) if direction == ACROSS
+                            else len(self.board[0]))]
+            if direction in directions else []
+            for direction in (ACROSS, DOWN))
+
+    def prepare_candidates(self, check_cancelled=None):
+        """
+        Собирает ходы всех линий при любых буквах игрока
+        (см. BoardLine.prepare_candidates), чтобы поиск для новых букв
+        не обходил словарь заново
+        :param check_cancelled: вызывается перед каждой линией,
+        бросает исключение, если подготовку нужно прервать
+        """
+
+        for lines in self.lines:
+            for board_line in lines:
+                if check_cancelled is not None:
+                    check_cancelled()
+                board_line.prepare_candidates(self.lexicon)
+
+    def get_lines(self, direction: int) -> [BoardLine]:
+        """
+        Линии одного направления
+        :param direction: ACROSS - строки, DOWN - столбцы
+        :return: массив линий по возрастанию индекса
+        """
+
+        return self.lines[direction]
 
 
 # authors: Pavel, Matvey
-def get_hint_for_empty_board(board: [[str]],
-                             letters: Counter) -> ([[str]], int):
+def get_hint_for_empty_board(board: [[str]], letters: Counter,
+                             lexicon: Lexicon = LEXICON) -> Move:
     """
     Дает лучшую подсказку для первого хода (пустая доска)
     :param board: доска в виде двумерного символьного массива
     :param letters: буквы, имеющиеся у игрока
-    :return: доска с лучшим словом, ценность этого слова на доске
+    :param lexicon: словарь, по которому ведется поиск
+    :return: лучший ход, None - ни одного слова составить нельзя
     """
 
     # todo: написал качественнее, после замера скорости заменю.
@@ -292,173 +380,26 @@ def get_hint_for_empty_board(board: [[str]],
     best_hint_value = 0  # цена
     best_hint_start_index = mid_index  # стартовый индекс
 
-    # открываем словарь
-    with open(DICTIONARY_FILE_PATH, 'r', encoding='utf-8') as dictionary:
-        for line in dictionary:  # Читаем строки из словаря
-            # если слово больше 7 букв - отбрасываем
-            # макс. длина 8, так как в конце есть \n
-            # отбрасывать \n до проверки неразумно, тратит много времени
-            if len(line) <= 8:
-                word = line[:-1]  # без \n
-                # если слово можно собрать - пропускаем его
-                if is_word_compilable(word, letters):
-                    # размещаем слово по всем разрешенным позициям
-                    for i in range(mid_index - len(word) + 1, mid_index + 1):
-                        # считаем его ценность
-                        value = evaluate_word(word, board, mid_index, i)
-                        # если ценность выше, чем у максимального,
-                        # меняем лучшее слово и все его параметры на найденое
-                        if value >= best_hint_value:
-                            best_word = word
-                            best_hint_value = value
-                            best_hint_start_index = i
-
-    # записываем лучшее слово в матрицу доски
-    best_hint = get_empty_board(len(board), len(board[0]))
-    for i in range(len(best_word)):
-        best_hint[mid_index][best_hint_start_index + i] = best_word[i]
-
-    return best_hint, best_hint_value
-
-
-# authors: Matvey, Pavel
-def get_empty_board(y: int, x: int) -> [[str]]:
-    """
-    Генерирует пустую матрицу в y строк и x столбцов
-    И заполняет ее символами пустыми строками
-    :param y: кол-во строк
-    :param x: кол-во столбцов
-    :return: матрица y*x
-    """
-
-    return [[''] * y for _ in range(x)]
-
-
-# author: Pavel
-def get_marked_rows(board: [[str]]) -> [[str]]:
-    """
-    Меняет доску, помечая заблокированные клетки знаком #
-    Работает только для горизонталей (rows)
-    Если у клетки есть символы сверху или снизу, то клетка заблокирована
-    Постобработка:
-    Между двумя # пустое пространство - все клетки между ними #
-    От начала до # пустое пространство - все клетки между ними #
-    От # до конца пустое пространство - все клетки между ними #
-    :param board: доска в виде двумерного символьного массива
-    :return: одномерный массив символов(row) с заблокированными клетками
-    """
-
-    marked_board = []  # новая доска с метками
-    for index in range(len(board)):  # идем по строкам
-        row = board[index].copy()  # i-тая строка доски
-        for symbol_index in range(len(row)):
-            up_block = False  # заблокировано ли сверху
-            down_block = False  # заблокировано ли снизу
-
-            if not row[symbol_index]:  # если в клетке пусто
-                if index > 0:  # если не самая верхняя строка
-                    if board[index - 1][symbol_index]:  # если сверху буква
-                        up_block = True
-                if index < (len(board) - 1):  # если не самая нижняя строка
-                    if board[index + 1][symbol_index]:  # если снизу буква
-                        down_block = True
-                if up_block or down_block:
-                    row[symbol_index] = '#'
-
-        # постобработка:
-        # между двумя # пустое пространство - все клетки между ними #
-        # от начала до # пустое пространство - все клетки между ними #
-        # от # до конца пустое пространство - все клетки между ними #
-
-        last_sharp_index = -2  # индекс последнего символа #
-        # -2: символы # не встречались
-        # -1: символы # встречались, но после них шли буквы
-
-        for row_index in range(len(row)):  # идем по строкам
-            if row[row_index] == '#':
-                # если уже встречали #, просто перезаписываем
-                if last_sharp_index == -1:
-                    last_sharp_index = row_index
-                # если это первая # и до этого символов не было, то все
-                # клетки до этого места помечаем #
-                elif last_sharp_index == -2:
-                    for j in range(row_index):
-                        row[j] = '#'
-                    last_sharp_index = row_index
-                # если уже встречали # и до этого между текущим #
-                # и прошлым не было # символов, помечаем # все клетки между ними
-                else:
-                    for j in range(last_sharp_index + 1, row_index):
-                        row[j] = '#'
-                    last_sharp_index = row_index
-            # если нашли какой-то символ, но не #, сбрасываем счетчик
-            elif row[row_index]:
-                last_sharp_index = -1
-
-            # если дошли до конца и между последним # и концом нет символов,
-            # все клетки между ними помечаем #
-            if row_index == (len(row) - 1) and last_sharp_index != -1:
-                for j in range(last_sharp_index + 1, row_index + 1):
-                    row[j] = '#'
-
-        marked_board.append(row)  # добавляем строку к новой доске
-
-    return marked_board
-
-
-# author: Pavel
-def get_word_positions_in_row(word: str, row: [str]) -> [int]:
-    """
-    Находит все возможные позиции слова в строке
-    :param word: слово
-    :param row: строка в виде массива символов
-    :return: массив индексов начала слова в строке
-    """
-
-    # индексы всех возможных позиций слова в строке
-    possible_indexes = []
-
-    # идем по строке так, чтобы слово влезло в строку
-    for i in range(len(row) - len(word) + 1):
-
-        # флаг, показывающий, все ли буквы могут поместиться в строку
-        is_word_fit = True
-
-        # счетчик совпадений по буквам
-        same_letters_counter = 0
-
-        # идем по слову
-        for j in range(len(word)):
-            # если буквы не совпадают и клетка в строке не пуста
-            if word[j] == row[i + j]:
-                same_letters_counter += 1
-            elif not row[i + j]:
-                pass
-            else:
-                # игнорируем данную позицию, идем дальше
-                is_word_fit = False
-                break
-
-        # если все буквы подошли
-        # и слово прикрепилось к хотя бы одной букве
-        # но слово не дублирует уже написанное
-        if is_word_fit and 0 < same_letters_counter < len(word):
-            # предыдущий символ
-            previous_sym = None
-            if i != 0:
-                previous_sym = row[i - 1]
-
-            # следующий символ
-            next_sym = None
-            if (i + len(word)) < len(row):
-                next_sym = row[i + len(word)]
-
-            # если и слева и справа не мешается буква - можем вставить слово
-            if not is_symbol_russian_letter(previous_sym) and \
-                    not is_symbol_russian_letter(next_sym):
-                possible_indexes.append(i)
-
-    return possible_indexes
+    # слова больше 7 букв не рассматриваем, из остальных
+    # по векторам кол-ва букв сразу отбираются те, что можно собрать
+    words = [decode_word(lexicon.get_word(index)) for index in
+             lexicon.get_compilable_words(letters, max_length=7)]
+    # каждое слово размещаем по всем разрешенным позициям
+    moves = [(word, i) for word in words
+             for i in range(mid_index - len(word) + 1, mid_index + 1)]
+    values = evaluate_line_words(moves, board[mid_index], mid_index)
+    # при равной ценности выбирается последний из лучших ходов
+    for (word, i), value in zip(moves, values):
+        if value >= best_hint_value:
+            best_word = word
+            best_hint_value = value
+            best_hint_start_index = i
+
+    if not best_word:
+        return None
+    # на пустой доске все буквы слова - новые фишки
+    return Move(best_word, mid_index, best_hint_start_index, ACROSS,
+                best_hint_value, (1 << len(best_word)) - 1)
 
 
 # author: Pavel
@@ -485,84 +426,73 @@ def get_used_letters(board: [[str]]) -> Counter:
     return letters_counter
 
 
-# authors: Matvey, Pavel
-def transpose_board(board: [[str]]) -> [[str]]:
+# author: Pavel
+def get_line(board: [[str]], direction: int, index: int) -> [str]:
     """
-    Транспонирует двумерный массив
+    Линия доски: строка или столбец
     :param board: доска в виде двумерного символьного массива
-    :return: транспонированная доска
+    :param direction: ACROSS - строка, DOWN - столбец
+    :param index: индекс строки или столбца
+    :return: линия в виде массива символов
     """
 
-    return list(np.array(board).transpose())
+    if direction == ACROSS:
+        return list(board[index])
+    return [row[index] for row in board]
 
 
 # author: Pavel
 def evaluate_word(word: str, board: [[str]],
-                  line_index: int, start_index: int) -> int:
+                  line_index: int, start_index: int,
+                  cross_scores: [int] = None) -> int:
     """
     Считает ценность слова, расположенного на доске,
     с учетом бонусов на доске в любых кол-вах.
     Не учитывает бонусы, которые уже были использованы.
     Если игрок доложил 7 букв - добавляет 15 баллов.
+    Если переданы частичные ценности перпендикулярных слов,
+    добавляет ценность каждого перпендикулярного слова,
+    образованного новой буквой
     :param word: слово, ценность которого нужно посчитать
     :param board: доска в виде двумерного символьного массива
     :param line_index: индекс строки, в которой стоит слово
     :param start_index: индекс начала слова в строке
+    :param cross_scores: частичные ценности перпендикулярных слов
+    для клеток строки (NO_CROSS_WORD - перпендикулярного слова нет)
     :return: ценность слова, с учетом бонусов
     """
 
-    # Считываем ценность букв как словарь
-    letters_values = LETTERS_VALUES
-
-    # Считываем бонусы на доске как матрицу
-    board_bonuses = BOARD_BONUSES
-    # разметка ценности полей доски:
-    # 00 - обычное поле
-    # x2 - *2 за букву
-    # x3 - *3 за букву
-    # X2 - *2 за слово
-    # X3 - *3 за слово
-    # ST - стартовое поле
-
-    value = 0
-    new_letters_counter = 0
-    word_bonuses_2x_counter = 0  # Сколько бонусов x2 слово собрали
-    word_bonuses_3x_counter = 0  # Сколько бонусов x3 слово собрали
-
-    for i in range(len(word)):  # Идем по буквам слова
-        letter = word[i]
-
-        letter_value = letters_values[letter]  # Ценность буквы без бонусов
-
-        bonus = board_bonuses[line_index][start_index + i]
-        # Бонус на клетке, где стоит буква
-
-        # Бонусы учитываются только в том случае,
-        # если они не были использованы ранее.
-        # Бонус использован, если на его месте уже есть буква.
-
-        # Если в клетке не было буквы
-        if not board[line_index][start_index + i]:
-            new_letters_counter += 1
-            if bonus == 'x2':
-                letter_value *= 2
-            elif bonus == 'x3':
-                letter_value *= 3
-            elif bonus == 'X2':
-                word_bonuses_2x_counter += 1
-            elif bonus == 'X3':
-                word_bonuses_3x_counter += 1
+    return evaluate_line_words([(word, start_index)], board[line_index],
+                               line_index, ACROSS, cross_scores)[0]
 
-        value += letter_value
-    # Считаем все собранные бонусы за слово
-    value *= 2 ** word_bonuses_2x_counter
-    value *= 3 ** word_bonuses_3x_counter
 
-    # Выложил разом 7 букв - получи 15 баллов
-    if new_letters_counter == 7:
-        value += 15
+# author: Pavel
+def evaluate_line_words(moves: [(str, int)], line: [str], line_index: int,
+                        direction: int = ACROSS,
+                        cross_scores: [int] = None) -> [int]:
+    """
+    Считает ценность сразу всех слов одной линии доски
+    по тем же правилам, что и evaluate_word
+    :param moves: пары (слово, индекс начала слова в линии)
+    :param line: линия доски в виде массива символов
+    :param line_index: индекс строки (ACROSS) или столбца (DOWN) доски
+    :param direction: направление линии
+    :param cross_scores: частичные ценности перпендикулярных слов
+    для клеток линии (NO_CROSS_WORD - перпендикулярного слова нет)
+    :return: ценности слов в порядке ходов
+    """
+
+    if direction == ACROSS:
+        letter_multipliers = LETTER_MULTIPLIERS[line_index, :]
+        word_multipliers = WORD_MULTIPLIERS[line_index, :]
+    else:
+        letter_multipliers = LETTER_MULTIPLIERS[:, line_index]
+        word_multipliers = WORD_MULTIPLIERS[:, line_index]
 
-    return value
+    return score_moves([word for word, _ in moves],
+                       [start for _, start in moves], line,
+                       letter_multipliers, word_multipliers,
+                       LETTERS_BYTE_VALUES, cross_scores).tolist()
 
 
 # author: Pavel
@@ -618,23 +548,6 @@ def is_board_letters_amount_right(board: [[str]]) -> bool:
     return True
 
 
-# author: Matvey
-def is_word_compilable(word: str, letters: Counter) -> bool:
-    """
-    Проверяет возможность составить слово из переданных букв.
-    :param word: слово
-    :param letters: буквы, имеющиеся у игрока
-    :return: можно ли составить из переданных букв переданое слово
-    """
-
-    word_letters = Counter(word)  # Счетчик букв для слова
-    for letter in word_letters.keys():
-        if letters[letter] < word_letters[letter]:
-            # Если количество букв у игрока меньше, чем букв в слове
-            return False
-    return True
-
-
 # author: Pavel
 def is_symbol_russian_letter(symbol: str) -> bool:
     """
@@ -0,0 +1,124 @@
+import heapq
+from bisect import bisect_right
+
+from assistant.move import Move
+
+
+# author: Pavel
+class TopNonOverlappingHints:
+    """
+    n самых ценных подсказок одного направления,
+    попарно не пересекающихся в своих линиях
+    Подсказки хранятся в ограниченной куче (наверху - наименее ценная,
+    из равных - добавленная позже) и в индексе отрезков по линиям.
+    Подсказки одной линии не пересекаются, поэтому в линии они
+    упорядочены по началу, и пересекающие новую подсказку
+    находятся двоичным поиском
+    """
+
+    def __init__(self, n: int):
+        """
+        :param n: сколько подсказок хранить
+        """
+
+        self.n = n
+        self._heap = []  # записи [ценность, -номер, ход]
+        self._lines = {}  # линия -> (начала слов, записи) по возрастанию
+        self._size = 0  # кол-во хранимых подсказок (без удаленных)
+        self._counter = 0  # номер следующей добавленной подсказки
+
+    def add(self, move: Move) -> bool:
+        """
+        Добавление подсказки
+        Подсказка отбрасывается, если она пересекает не менее ценную
+        из хранимых или не ценнее наименее ценной при полном наборе.
+        Иначе менее ценные пересекаемые ею подсказки удаляются,
+        а при переполнении удаляется наименее ценная
+        :param move: ход
+        :return: true - подсказка добавлена
+        """
+
+        value = move.score
+        if self.n <= 0 or (self._size == self.n and value <= self.min_value):
+            return False
+
+        overlapping = self._get_overlapping(move)
+        for entry in overlapping:
+            if entry[0] >= value:
+                return False
+        for entry in overlapping:
+            self._remove(entry)
+
+        entry = [value, -self._counter, move]
+        self._counter += 1
+        heapq.heappush(self._heap, entry)
+        starts, entries = self._lines.setdefault(move.line_index, ([], []))
+        index = bisect_right(starts, move.start_index)
+        starts.insert(index, move.start_index)
+        entries.insert(index, entry)
+        self._size += 1
+
+        if self._size > self.n:
+            self._remove(self._pop_min())
+        return True
+
+    @property
+    def min_value(self) -> int:
+        """
+        Ценность наименее ценной хранимой подсказки (None, если их нет)
+        """
+
+        self._drop_removed()
+        return self._heap[0][0] if self._heap else None
+
+    def get_hints(self) -> [Move]:
+        """
+        Хранимые подсказки по убыванию ценности
+        (из равных раньше идет добавленная раньше)
+        :return: массив ходов
+        """
+
+        entries = sorted((entry for entry in self._heap
+                          if entry[2] is not None),
+                         reverse=True)
+        return [move for _, _, move in entries]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _get_overlapping(self, move: Move) -> [list]:
+        """
+        Хранимые подсказки линии хода, пересекающие отрезок его слова
+        """
+
+        if move.line_index not in self._lines:
+            return []
+        starts, entries = self._lines[move.line_index]
+        x = move.start_index
+        end = x + len(move.word) - 1
+        overlapping = []
+        # подсказки, начинающиеся не правее конца слова, идут
+        # по возрастанию концов - с конца берем, пока они заходят на слово
+        i = bisect_right(starts, end) - 1
+        while i >= 0 and starts[i] + len(entries[i][2].word) - 1 >= x:
+            overlapping.append(entries[i])
+            i -= 1
+        return overlapping
+
+    def _pop_min(self) -> list:
+        self._drop_removed()
+        return heapq.heappop(self._heap)
+
+    def _drop_removed(self):
+        # удаленные подсказки остаются в куче до выхода наверх
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+
+    def _remove(self, entry: list):
+        move = entry[2]
+        starts, entries = self._lines[move.line_index]
+        index = bisect_right(starts, move.start_index) - 1
+        del starts[index]
+        del entries[index]
+        entry[2] = None
+        self._size -= 1
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Пакетное распознавание фотографий доски на всех ядрах.
+# Пример:
+#     python batch_recognition.py archive/ "photos/**/*.jpg" -o boards/
+# Для каждой фотографии выводится (или записывается в output/<имя>.json)
+# JSON с распознанной доской, в конце - сводка ошибок.
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from pathlib import Path
+
+import cv2
+from skimage import img_as_ubyte
+from skimage.io import imread
+
+from CV.exceptions import CutException
+from CV.scan import BINARIZATION_ACCURATE, BINARIZATION_FAST
+from ML.letter_recognition import photo_to_board
+from ML.model_registry import warm_up_models
+from assistant.postprocessing import full_postprocessing
+from preprocessing.model import CLASSIFIER_DUMP_PATH
+
+# расширения фотографий при передаче папки
+IMAGES_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+# author: Pavel
+def get_images_paths(patterns: [str]) -> [Path]:
+    """
+    Пути к фотографиям по папкам и шаблонам glob (в т.ч. с **)
+    :param patterns: папки, файлы или шаблоны
+    :return: отсортированный массив путей без повторов
+    """
+
+    paths = set()
+    for pattern in patterns:
+        if Path(pattern).is_dir():
+            paths.update(path for path in Path(pattern).iterdir()
+                         if path.suffix.lower() in IMAGES_EXTENSIONS)
+        else:
+            paths.update(Path(path) for path in glob(pattern, recursive=True)
+                         if Path(path).is_file())
+    return sorted(paths)
+
+
+# author: Pavel
+def init_worker(clf_path: Path):
+    """
+    Инициализация процесса: OpenCV работает в одном потоке (параллельность
+    уже дают процессы), модель загружается один раз на процесс
+    :param clf_path: путь к дампу классификатора
+    """
+
+    cv2.setNumThreads(1)
+    warm_up_models(clf_path)
+
+
+# author: Pavel
+def recognize_image(path: Path, clf_path: Path,
+                    binarization: str = BINARIZATION_ACCURATE,
+                    postprocessing: bool = True) -> dict:
+    """
+    Распознавание одной фотографии (выполняется в процессе пула)
+    :param path: путь к фотографии
+    :param clf_path: путь к дампу классификатора
+    :param binarization: режим перевода в ЧБ
+    :param postprocessing: применять ли постобработку доски
+    :return: {'image', 'board', 'time'} или {'image', 'error', 'message'}
+    """
+
+    start = time.perf_counter()
+    try:
+        img = img_as_ubyte(imread(str(path)))
+        _, board = photo_to_board(img, clf_path, binarization=binarization)
+    except CutException as e:
+        return {'image': str(path), 'error': 'CutException',
+                'message': str(e)}
+    except Exception as e:
+        # нечитаемый файл, ошибка OpenCV или классификатора: ошибка одной
+        # фотографии не должна прерывать всю пачку
+        return {'image': str(path), 'error': type(e).__name__,
+                'message': str(e)}
+
+    if postprocessing:
+        board = full_postprocessing(board)
+    return {'image': str(path), 'board': board,
+            'time': round(time.perf_counter() - start, 3)}
+
+
+# author: Pavel
+def recognize_images(paths: [Path], clf_path: Path = CLASSIFIER_DUMP_PATH,
+                     binarization: str = BINARIZATION_ACCURATE,
+                     postprocessing: bool = True, workers: int = None):
+    """
+    Распознавание фотографий в пуле процессов
+    Результаты выдаются по мере готовности в порядке путей
+    :param paths: пути к фотографиям
+    :param clf_path: путь к дампу классификатора
+    :param binarization: режим перевода в ЧБ
+    :param postprocessing: применять ли постобработку доски
+    :param workers: кол-во процессов, None - по кол-ву ядер
+    :return: генератор словарей (см. recognize_image)
+    """
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        init_worker(clf_path)
+        for path in paths:
+            yield recognize_image(path, clf_path, binarization,
+                                  postprocessing)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(clf_path,)) as executor:
+        count = len(paths)
+        yield from executor.map(recognize_image, paths, [clf_path] * count,
+                                [binarization] * count,
+                                [postprocessing] * count)
+
+
+# author: Pavel
+def main(args: [str] = None) -> int:
+    """
+    Точка входа командной строки
+    :param args: аргументы (None - sys.argv)
+    :return: код возврата: 0 - все распознано, 1 - были ошибки
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Пакетное распознавание фотографий доски')
+    parser.add_argument('images', nargs='+',
+                        help='папки, файлы или шаблоны glob с фотографиями')
+    parser.add_argument('-o', '--output', type=Path,
+                        help='папка для JSON досок (по умолчанию - JSON '
+                             'построчно в stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='кол-во процессов (по умолчанию - все ядра)')
+    parser.add_argument('--binarization', default=BINARIZATION_ACCURATE,
+                        choices=(BINARIZATION_ACCURATE, BINARIZATION_FAST),
+                        help='режим перевода в ЧБ')
+    parser.add_argument('--clf', type=Path, default=CLASSIFIER_DUMP_PATH,
+                        help='путь к дампу классификатора')
+    parser.add_argument('--raw', action='store_true',
+                        help='не применять постобработку доски')
+    args = parser.parse_args(args)
+
+    if not args.clf.exists():
+        print(f'Не найден дамп классификатора {args.clf}', file=sys.stderr)
+        return 1
+
+    paths = get_images_paths(args.images)
+    if args.output is not None:
+        args.output.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    failures = []
+    json_names = set()  # фотографии с одинаковыми именами из разных папок
+    for result in recognize_images(paths, args.clf, args.binarization,
+                                   not args.raw, args.workers):
+        if 'error' in result:
+            failures.append(result)
+            print(f'{result["image"]}: {result["error"]} '
+                  f'{result["message"]}', file=sys.stderr)
+            continue
+        if args.output is None:
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        else:
+            name = Path(result['image']).stem
+            suffix = 1
+            while name + ('' if suffix == 1 else f'_{suffix}') in json_names:
+                suffix += 1
+            name += '' if suffix == 1 else f'_{suffix}'
+            json_names.add(name)
+            json_path = args.output / (name + '.json')
+            with open(json_path, 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False)
+
+    elapsed = time.perf_counter() - start
+    summary = {'images': len(paths),
+               'recognized': len(paths) - len(failures),
+               'failed': len(failures),
+               'errors': {},
+               'time': round(elapsed, 3),
+               'failures': failures}
+    for failure in failures:
+        summary['errors'][failure['error']] = \
+            summary['errors'].get(failure['error'], 0) + 1
+    if args.output is not None:
+        with open(args.output / 'summary.json', 'w', encoding='utf-8') as file:
+            json.dump(summary, file, ensure_ascii=False, indent=1)
+
+    print(f'Распознано {summary["recognized"]} из {len(paths)} '
+          f'за {elapsed:.1f} с, ошибок: {summary["failed"]} '
+          f'{summary["errors"] or ""}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Сравнение режимов перевода фотографии доски в ЧБ по скорости и точности.
+# Точный режим (denoise_tv_bregman) считается эталоном.
+# Неравномерное освещение моделируется тенью поверх фотографии,
+# эталон при этом считается по фотографии без тени.
+
+import time
+from pathlib import Path
+
+import numpy as np
+from skimage import img_as_ubyte
+from skimage.io import imread
+
+from CV.exceptions import CutException
+from CV.scan import BINARIZATION_ACCURATE, BINARIZATION_FAST, \
+    SMOOTHING_BILATERAL, SMOOTHING_MEDIAN, THRESHOLD_ADAPTIVE, \
+    THRESHOLD_GLOBAL, cut_by_external_contour, \
+    cut_by_internal_contour, cut_board_on_cells, crop_letters, \
+    get_letters_boxes, gray_to_binary, rgb_to_gray
+from ML.letter_recognition import classify_images, nums_to_letters
+from preprocessing.model import CLASSIFIER_DUMP_PATH
+
+# фотографии для сравнения
+IMAGES_PATHS = [Path('resources/for_md_files/for_readme/raw.jpg'),
+                Path('resources/for_md_files/for_example/stage0.jpg')]
+# проверяемые настройки быстрого режима: (фильтр, масштаб, порогование)
+FAST_SETTINGS = [(SMOOTHING_BILATERAL, 1.0, THRESHOLD_ADAPTIVE),
+                 (SMOOTHING_BILATERAL, 1.0, THRESHOLD_GLOBAL),
+                 (SMOOTHING_BILATERAL, 0.5, THRESHOLD_ADAPTIVE),
+                 (SMOOTHING_MEDIAN, 1.0, THRESHOLD_ADAPTIVE),
+                 (SMOOTHING_MEDIAN, 1.0, THRESHOLD_GLOBAL),
+                 (SMOOTHING_MEDIAN, 0.5, THRESHOLD_ADAPTIVE)]
+# глубина тени: яркость падает к углу доски до 1 - глубина (0 - без тени)
+SHADOW_DEPTHS = [0.0, 0.4]
+
+
+# author: Pavel
+def compare_binarization(images_paths: [Path] = IMAGES_PATHS,
+                         fast_settings: [(str, float, str)] = FAST_SETTINGS,
+                         shadow_depths: [float] = SHADOW_DEPTHS,
+                         clf_path: Path = CLASSIFIER_DUMP_PATH) -> dict:
+    """
+    Сравнивает быстрый режим перевода в ЧБ с точным
+    Для каждой фотографии, глубины тени и настройки считаются:
+    время перевода в ЧБ, совпадение пикселей (IoU белых пикселей),
+    доля клеток, в которых буква найдена в том же квадрате,
+    и, если есть дамп классификатора, доля одинаково распознанных клеток.
+    Эталон - точный режим на фотографии без тени
+    :param images_paths: пути к фотографиям доски
+    :param fast_settings: настройки быстрого режима
+    (фильтр, масштаб, порогование)
+    :param shadow_depths: глубины тени (см. add_shadow)
+    :param clf_path: путь к дампу классификатора
+    :return: словарь {настройка: средние значения метрик}
+    """
+
+    clf_path = Path(Path.cwd().parent / clf_path)
+    use_clf = clf_path.exists()
+    if not use_clf:
+        print(f'Дамп классификатора {clf_path} не найден, '
+              f'распознавание не сравнивается')
+
+    settings = [(BINARIZATION_ACCURATE, None, None, None)] + \
+        [(BINARIZATION_FAST, smoothing, scale, threshold)
+         for smoothing, scale, threshold in fast_settings]
+
+    results = {}
+    for path in images_paths:
+        try:
+            img = img_as_ubyte(imread(str(Path.cwd().parent / path)))
+            img = img_as_ubyte(cut_by_external_contour(img))
+            img_squared = img_as_ubyte(cut_by_internal_contour(img))
+        except (CutException, AttributeError, ValueError):
+            print(f'{path}: не удалось обрезать доску')
+            continue
+        img_gray = rgb_to_gray(img_squared, [1, 0, 0])
+
+        reference = gray_to_binary(img_gray)
+        reference_white = reference > 0
+        reference_cells = img_as_ubyte(cut_board_on_cells(reference))
+        reference_boxes = np.stack(get_letters_boxes(reference_cells))
+        if use_clf:
+            reference_board = recognize_cells(reference_cells, clf_path)
+
+        print(f'{path} ({img_gray.shape[1]}x{img_gray.shape[0]}):')
+        for depth in shadow_depths:
+            img_shadowed = add_shadow(img_gray, depth)
+            for mode, smoothing, scale, threshold in settings:
+                start = time.perf_counter()
+                if mode == BINARIZATION_ACCURATE:
+                    binary = gray_to_binary(img_shadowed)
+                else:
+                    binary = gray_to_binary(img_shadowed, mode, smoothing,
+                                            scale, threshold)
+                binarization_time = time.perf_counter() - start
+
+                white = binary > 0
+                iou = (white & reference_white).sum() / \
+                    max((white | reference_white).sum(), 1)
+                cells = img_as_ubyte(cut_board_on_cells(binary))
+                boxes = np.stack(get_letters_boxes(cells))
+                same_boxes = np.all(boxes == reference_boxes, axis=0).mean()
+                same_letters = np.nan
+                if use_clf:
+                    board = recognize_cells(cells, clf_path)
+                    same_letters = (board == reference_board).mean()
+
+                setting = mode if mode == BINARIZATION_ACCURATE else \
+                    f'{mode} {smoothing} x{scale} {threshold}'
+                setting += f' тень {depth}'
+                print(f'    {setting}: {binarization_time * 1000:.1f} мс, '
+                      f'IoU {iou:.3f}, '
+                      f'те же квадраты букв {same_boxes:.1%}, '
+                      f'те же буквы {same_letters:.1%}')
+                results.setdefault(setting, []).append(
+                    (binarization_time, iou, same_boxes, same_letters))
+
+    # средние по всем фотографиям
+    print('Среднее:')
+    summary = {}
+    for setting, values in results.items():
+        summary[setting] = dict(zip(('time', 'iou', 'same_boxes',
+                                     'same_letters'),
+                                    np.mean(values, axis=0)))
+        print(f'    {setting}: {summary[setting]["time"] * 1000:.1f} мс, '
+              f'IoU {summary[setting]["iou"]:.3f}, '
+              f'те же квадраты букв {summary[setting]["same_boxes"]:.1%}, '
+              f'те же буквы {summary[setting]["same_letters"]:.1%}')
+    return summary
+
+
+# author: Pavel
+def add_shadow(img_gray: np.ndarray, depth: float) -> np.ndarray:
+    """
+    Неравномерное освещение: яркость линейно падает от левого верхнего
+    угла доски к правому нижнему
+    :param img_gray: изображение в оттенках серого uint8
+    :param depth: насколько падает яркость в дальнем углу (0 - без тени)
+    :return: изображение с тенью uint8
+    """
+
+    h, w = img_gray.shape[:2]
+    shade = 1 - depth * (np.linspace(0, 0.5, h)[:, np.newaxis] +
+                         np.linspace(0, 0.5, w)[np.newaxis, :])
+    return (img_gray * shade).astype(np.uint8)
+
+
+# author: Pavel
+def recognize_cells(cells: np.ndarray, clf_path: Path) -> np.ndarray:
+    """
+    Распознавание клеток ЧБ доски (как в image_to_board)
+    :param cells: клетки доски (15, 15, IMG_SIZE, IMG_SIZE)
+    :param clf_path: путь к дампу классификатора
+    :return: массив букв 15x15
+    """
+
+    predictions, probabilities = classify_images(crop_letters(cells),
+                                                 clf_path=clf_path,
+                                                 probability=True)
+    return np.array(nums_to_letters(predictions, probabilities))
+
+
+if __name__ == '__main__':
+    compare_binarization()
@@ -1,99 +1,382 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-# Запускаем один раз, для нарезки датасета.
+# Нарезка датасета из фотографий доски.
+# Фотографии обрабатываются параллельно в пуле процессов. Уже нарезанные
+# фотографии (см. SLICED_LIST_NAME) при повторном запуске пропускаются,
+# поэтому после добавления новых фотографий нарезаются только они.
+# Кроме папок категорий с JPEG, клетки записываются одним массивом
+# (см. PACKED_CELLS_NAME), который читается через np.memmap.
 
+import json
+import os
 import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from shutil import rmtree
 
+import cv2
 import numpy as np
 from skimage import img_as_ubyte
-from skimage.io import imread, imsave
+from skimage.io import imread
 
 from CV.exceptions import CutException
-from CV.scan import crop_letter, cut_board_on_cells, \
-    cut_by_external_contour, cut_by_internal_contour, \
-    rgb_to_gray, gray_to_binary, IMG_SIZE
+from CV.scan import BINARIZATION_ACCURATE, cut_board_on_cells, \
+    cut_by_external_contour, cut_by_internal_contour, crop_letters, \
+    gray_to_binary, resize_board, rgb_to_gray, IMG_SIZE
 
 IMAGES_TO_CUT_PATH = Path('ML/images_to_cut')
 DATASET_PATH = Path('ML/dataset')
 IS_EMPTY_CELLS_INCLUDED = False  # True, если нужны пустые клетки в датасете
+# False - датасет нарезается заново, True - дорезаются только новые фото
+IS_INCREMENTAL = True
+# список нарезанных фотографий в папке датасета: имя -> [размер, изменение]
+SLICED_LIST_NAME = 'sliced.json'
+WORKERS = None  # кол-во процессов, None - по кол-ву ядер
+# упакованный датасет в папке датасета: клетки (N, IMG_SIZE, IMG_SIZE) uint8,
+# их категории (N,) и фотографии, из которых они вырезаны (N,)
+PACKED_CELLS_NAME = 'cells.npy'
+PACKED_LABELS_NAME = 'labels.npy'
+PACKED_PHOTOS_NAME = 'photos.npy'
+PACK_BATCH = 200  # через сколько нарезанных фотографий дописывать упаковку
+
+# одномерные координаты клеток с буквами (а..я, *), пустых и цветных
+LETTERS_COORDINATES = np.arange(33)
+EMPTY_COORDINATES = np.array([50, 52, 48, 76, 105, 112])
+# категории для классификации
+LETTERS_CATEGORIES = [str(category) for category in range(1, 34)]
+EMPTY_CATEGORIES = ['Empty', 'Green', 'Blue', 'Yellow', 'Red', 'White']
+
+
+# author: Pavel
+def get_cells_categories(is_empty_cells_included: bool =
+                         IS_EMPTY_CELLS_INCLUDED) -> (np.ndarray, [str]):
+    """
+    Клетки доски для датасета и их категории
+    :param is_empty_cells_included: добавлять ли пустые клетки
+    :return: одномерные координаты клеток и названия категорий
+    """
+
+    if is_empty_cells_included:
+        return np.append(LETTERS_COORDINATES, EMPTY_COORDINATES), \
+            LETTERS_CATEGORIES + EMPTY_CATEGORIES
+    return LETTERS_COORDINATES, list(LETTERS_CATEGORIES)
+
+
+# author: Pavel
+def slice_board_photo(img: np.ndarray, coordinates: np.ndarray,
+                      binarization: str = BINARIZATION_ACCURATE) \
+        -> np.ndarray:
+    """
+    Нарезка одной фотографии доски на клетки датасета
+    Вся доска переводится в ЧБ один раз - так же, как при распознавании
+    (ML.letter_recognition.image_to_board), и буквы вырезаются сразу
+    во всех клетках
+    :param img: фотография доски
+    :param coordinates: одномерные координаты нужных клеток
+    :param binarization: режим перевода в ЧБ
+    :return: массив (кол-во клеток, IMG_SIZE, IMG_SIZE) uint8
+    """
+
+    try:
+        img_squared = cut_by_internal_contour(cut_by_external_contour(img))
+    except (AttributeError, ValueError) as e:
+        raise CutException(str(e))
+
+    img_gray = rgb_to_gray(resize_board(img_squared), [1, 0, 0])
+    img_bw = gray_to_binary(img_gray, binarization)
+    board_squares = img_as_ubyte(cut_board_on_cells(img_bw))
+    squares = board_squares.reshape((225, IMG_SIZE, IMG_SIZE))[coordinates]
+
+    # crop_letters работает с доской любой формы (строки, столбцы, ...)
+    return crop_letters(squares[np.newaxis]).reshape(
+        (len(coordinates), IMG_SIZE, IMG_SIZE))
+
+
+# author: Pavel
+def slice_photo_file(path: Path, dataset_path: Path, coordinates: np.ndarray,
+                     categories: [str]) -> (str, np.ndarray):
+    """
+    Нарезка фотографии и запись ее клеток в папки категорий
+    (выполняется в процессе пула)
+    :param path: путь к фотографии
+    :param dataset_path: путь к датасету
+    :param coordinates: одномерные координаты клеток
+    :param categories: категории клеток
+    :return: имя фотографии и ее клетки (None, если она не обрезалась)
+    """
+
+    # предупреждения при обработке - признак плохой фотографии
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            cells = slice_board_photo(img_as_ubyte(imread(str(path))),
+                                      coordinates)
+        except (CutException, RuntimeWarning, UserWarning):
+            return path.name, None
+
+    for cell, category in zip(cells, categories):
+        cv2.imwrite(str(dataset_path / category / path.name), cell)
+    return path.name, cells
+
+
+# author: Pavel
+def get_photo_stamp(path: Path) -> [int]:
+    """
+    Отметка версии фотографии: размер и время изменения файла
+    """
+
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# author: Pavel
+def read_sliced_list(dataset_path: Path) -> dict:
+    """
+    Список уже нарезанных фотографий датасета
+    :param dataset_path: путь к датасету
+    :return: словарь имя -> отметка версии (см. get_photo_stamp)
+    """
+
+    try:
+        with open(dataset_path / SLICED_LIST_NAME, encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+# author: Pavel
+def write_sliced_list(dataset_path: Path, sliced: dict):
+    """
+    Запись списка нарезанных фотографий (через временный файл)
+    """
+
+    tmp_path = dataset_path / (SLICED_LIST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(sliced, file, ensure_ascii=False, indent=1)
+    tmp_path.replace(dataset_path / SLICED_LIST_NAME)
+
+
+# author: Pavel
+def read_packed_dataset(dataset_path: Path = DATASET_PATH,
+                        mmap: bool = True) -> (np.ndarray, np.ndarray,
+                                               np.ndarray):
+    """
+    Чтение упакованного датасета
+    Клетки не читаются в память целиком, а отображаются через np.memmap
+    :param dataset_path: путь к датасету (относительно корня проекта)
+    :param mmap: false - прочитать клетки в память одним чтением
+    :return: клетки (N, IMG_SIZE, IMG_SIZE) uint8, категории (N,),
+    фотографии (N,)
+    """
+
+    dataset_path = Path(Path.cwd().parent / dataset_path)
+    cells = np.load(dataset_path / PACKED_CELLS_NAME,
+                    mmap_mode='r' if mmap else None)
+    labels = np.load(dataset_path / PACKED_LABELS_NAME)
+    photos = np.load(dataset_path / PACKED_PHOTOS_NAME)
+    return cells, labels, photos
 
-# authors: Mikhail, Matvey
-if __name__ == "__main__":
 
-    # Массив одномерных координат клеток с буквами и пустых
-    coordinates = np.arange(33)
-    if IS_EMPTY_CELLS_INCLUDED:
-        coordinates = np.append(coordinates, (50, 52, 48, 76, 105, 112))
-    coordinates = np.reshape(coordinates, (len(coordinates), 1))
-
-    # Массив категорий для классификации
-    categories = np.arange(1, 34)
-    if IS_EMPTY_CELLS_INCLUDED:
-        categories = np.append(categories, ('Empty', 'Green', 'Blue',
-                                            'Yellow', 'Red', 'White'))
-    # Объединение их в массив, состоящий из [координата, категория]
-    crd_ctg = []
-    for i in range(len(categories)):
-        crd_ctg = np.append(crd_ctg, (str(coordinates[i][0]),
-                                      str(categories[i])))  # fixme
-    crd_ctg = np.reshape(crd_ctg, (len(coordinates), 2))
-
-    # (Пере-)создание папок-категорий будущего датасета
-    if not (Path.cwd().parent / DATASET_PATH).exists():
-        Path.mkdir(Path.cwd().parent / DATASET_PATH)
-    else:
+# author: Pavel
+def is_packed_dataset_exists(dataset_path: Path) -> bool:
+    """
+    Есть ли в папке датасета упакованный датасет
+    :param dataset_path: абсолютный путь к датасету
+    """
+
+    return all((dataset_path / name).exists() for name in
+               (PACKED_CELLS_NAME, PACKED_LABELS_NAME, PACKED_PHOTOS_NAME))
+
+
+# author: Pavel
+def write_packed_dataset(dataset_path: Path, new_cells: dict,
+                         categories: [str], sliced: dict):
+    """
+    Обновление упакованного датасета: из старого остаются клетки
+    нарезанных и не перенарезанных фотографий, к ним добавляются новые
+    Массив пишется потоково в файл через np.lib.format.open_memmap
+    :param dataset_path: абсолютный путь к датасету
+    :param new_cells: имя фотографии -> клетки только что нарезанных фото
+    :param categories: категории клеток
+    :param sliced: список всех нарезанных фотографий
+    """
+
+    old_cells, old_labels, old_photos = None, np.array([], dtype=str), \
+        np.array([], dtype=str)
+    if is_packed_dataset_exists(dataset_path):
+        old_cells = np.load(dataset_path / PACKED_CELLS_NAME, mmap_mode='r')
+        old_labels = np.load(dataset_path / PACKED_LABELS_NAME)
+        old_photos = np.load(dataset_path / PACKED_PHOTOS_NAME)
+    keep = np.array([photo in sliced and photo not in new_cells
+                     for photo in old_photos.tolist()], dtype=bool)
+
+    names = sorted(new_cells)
+    count = int(keep.sum()) + len(names) * len(categories)
+    tmp_path = dataset_path / (PACKED_CELLS_NAME + '.tmp')
+    cells = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                      shape=(count, IMG_SIZE, IMG_SIZE))
+    kept = int(keep.sum())
+    if kept:
+        cells[:kept] = old_cells[keep]
+    for i, name in enumerate(names):
+        start = kept + i * len(categories)
+        cells[start:start + len(categories)] = new_cells[name]
+    cells.flush()
+    del cells, old_cells
+
+    labels = np.concatenate([old_labels[keep],
+                             np.tile(np.array(categories), len(names))])
+    photos = np.concatenate([old_photos[keep],
+                             np.repeat(np.array(names, dtype=str),
+                                       len(categories))])
+    # подписи пишутся раньше клеток: при прерывании несовпадение длин
+    # видно в pack_dataset_folders
+    np.save(dataset_path / PACKED_LABELS_NAME, labels.astype(str))
+    np.save(dataset_path / PACKED_PHOTOS_NAME, photos.astype(str))
+    tmp_path.replace(dataset_path / PACKED_CELLS_NAME)
+
+
+# author: Pavel
+def pack_dataset_folders(dataset_path: Path, categories: [str],
+                         sliced: dict):
+    """
+    Упаковка уже нарезанного датасета из папок категорий (для датасетов,
+    нарезанных до появления упакованного формата)
+    :param dataset_path: абсолютный путь к датасету
+    :param categories: категории клеток
+    :param sliced: список нарезанных фотографий
+    """
+
+    cells = {}
+    for name in sliced:
+        images = [cv2.imread(str(dataset_path / category / name),
+                             cv2.IMREAD_GRAYSCALE) for category in categories]
+        if all(image is not None and image.shape == (IMG_SIZE, IMG_SIZE)
+               for image in images):
+            cells[name] = np.array(images)
+
+    # упаковывается заново целиком
+    for name in (PACKED_CELLS_NAME, PACKED_LABELS_NAME, PACKED_PHOTOS_NAME):
+        if (dataset_path / name).exists():
+            (dataset_path / name).unlink()
+    write_packed_dataset(dataset_path, cells, categories, sliced)
+
+
+# author: Pavel
+def is_packed_dataset_consistent(dataset_path: Path, categories: [str],
+                                 sliced: dict) -> bool:
+    """
+    Совпадает ли упакованный датасет со списком нарезанных фотографий
+    """
+
+    if not is_packed_dataset_exists(dataset_path):
+        return not sliced
+    cells = np.load(dataset_path / PACKED_CELLS_NAME, mmap_mode='r')
+    photos = np.load(dataset_path / PACKED_PHOTOS_NAME)
+    return len(cells) == len(photos) and \
+        len(photos) == len(sliced) * len(categories) and \
+        set(photos.tolist()) == set(sliced)
+
+
+# author: Pavel
+def prepare_dataset_folders(dataset_path: Path, categories: [str],
+                            is_incremental: bool) -> bool:
+    """
+    Создание папок-категорий датасета
+    Без дорезки существующий датасет удаляется (после подтверждения)
+    :return: false - операция отменена
+    """
+
+    if dataset_path.exists() and not is_incremental:
         print("Внимание: существующий датасет будет удалён. "
               "Введите 'y', чтобы продолжить:", end=' ')
         if input() != 'y':
-            exit('Операция отменена')
-    for folder in (Path.cwd().parent / DATASET_PATH).glob('*'):
-        rmtree(Path.cwd().parent / DATASET_PATH / Path(folder), True)
-    time.sleep(3)  # Задержка перед созданием новых папок
+            return False
+        rmtree(dataset_path)
+
     for category in categories:
-        (Path.cwd().parent / DATASET_PATH / Path(str(category))). \
-            mkdir(mode=0o777)
+        (dataset_path / category).mkdir(parents=True, exist_ok=True)
+    return True
+
+
+# author: Pavel
+def build_dataset(images_path: Path = IMAGES_TO_CUT_PATH,
+                  dataset_path: Path = DATASET_PATH,
+                  is_empty_cells_included: bool = IS_EMPTY_CELLS_INCLUDED,
+                  is_incremental: bool = IS_INCREMENTAL,
+                  workers: int = WORKERS) -> [str]:
+    """
+    Нарезка датасета из всех фотографий папки в пуле процессов
+    Выводит ход работы и скорость (фото/с и клеток/с)
+    :param images_path: путь к фотографиям
+    :param dataset_path: путь к датасету
+    :param is_empty_cells_included: добавлять ли пустые клетки
+    :param is_incremental: нарезать только новые и измененные фотографии
+    :param workers: кол-во процессов, None - по кол-ву ядер
+    :return: имена фотографий, которые не удалось обрезать
+    """
+
+    images_path = Path(Path.cwd().parent / images_path)
+    dataset_path = Path(Path.cwd().parent / dataset_path)
+    coordinates, categories = get_cells_categories(is_empty_cells_included)
+
+    if not prepare_dataset_folders(dataset_path, categories, is_incremental):
+        exit('Операция отменена')
 
-    # Создаем генератор путей исходных изображений
-    path_gen = (Path.cwd().parent / IMAGES_TO_CUT_PATH).glob('*.jpg')
-    # Записываем пути
-    paths = [path for path in path_gen if path.is_file()]
+    paths = sorted(path for path in images_path.glob('*.jpg')
+                   if path.is_file())
+    sliced = read_sliced_list(dataset_path) if is_incremental else {}
+    # датасет, нарезанный без упакованного формата (или прерванный)
+    if not is_packed_dataset_consistent(dataset_path, categories, sliced):
+        print('Упаковка уже нарезанных клеток')
+        pack_dataset_folders(dataset_path, categories, sliced)
+    stamps = {path.name: get_photo_stamp(path) for path in paths}
+    new_paths = [path for path in paths
+                 if sliced.get(path.name) != stamps[path.name]]
+    print(f'Фотографий: {len(paths)}, уже нарезано: '
+          f'{len(paths) - len(new_paths)}, нарезается: {len(new_paths)}')
 
     bad_images = []  # Массив для отлова фоток, которые не получилось обрезать
-    warnings.filterwarnings('error')
+    new_cells = {}  # клетки нарезанных фото для упакованного датасета
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        count = len(new_paths)
+        results = executor.map(slice_photo_file, new_paths,
+                               [dataset_path] * count,
+                               [coordinates] * count, [categories] * count,
+                               chunksize=max(1, count // (workers * 8)))
+        for k, (filename, cells) in enumerate(results, 1):
+            if cells is not None:
+                sliced[filename] = stamps[filename]
+                new_cells[filename] = cells
+            else:
+                bad_images.append(filename)
+                sliced.pop(filename, None)
+            # список и упакованный датасет пишутся по ходу, чтобы
+            # прерванная нарезка не начиналась заново
+            if len(new_cells) == PACK_BATCH or k == count:
+                write_packed_dataset(dataset_path, new_cells, categories,
+                                     sliced)
+                write_sliced_list(dataset_path, sliced)
+                new_cells = {}
+
+            # Вывод хода выполнения и скорости
+            elapsed = time.perf_counter() - start
+            print(f'{filename} | {k / count:.1%} | '
+                  f'{k / elapsed:.1f} фото/с, '
+                  f'{k * len(coordinates) / elapsed:.0f} клеток/с')
 
-    for k, file_img in enumerate(paths, 1):
-        filename = str(file_img).split('\\')[-1]  # fixme
-        image = imread(str(file_img))
-        try:
-            external_crop = cut_by_external_contour(image)
-            internal_crop = cut_by_internal_contour(external_crop)
-            board_squares = cut_board_on_cells(internal_crop)
-            # Решейп из двухмерного в одномерный массив изображений
-            flat_board = board_squares.reshape(
-                (board_squares.shape[0] * board_squares.shape[1], IMG_SIZE,
-                 IMG_SIZE, 3))  # если нет фильтра то добавляется форма 3
-
-            # Обработка и запись клеток
-            for c in crd_ctg:
-                img_cell = flat_board[int(c[0])]
-                img_cell = rgb_to_gray(img_cell, [1, 0, 0])
-                img_cell = gray_to_binary(img_cell)
-                img_cell = img_as_ubyte(img_cell)
-                # Округление можно добавить тут.
-                img_cell = crop_letter(img_cell)  # не работает как надо?
-
-                imsave(str(Path.cwd().parent / DATASET_PATH / Path(c[1]) /
-                           Path(filename)), img_cell)
-        except (CutException, RuntimeWarning, UserWarning):
-            bad_images.append(filename)
-        # Вывод процента выполнения
-        print(filename, '|', str(round(k / len(paths) * 100, 1)) + "%")
     # Вывод результатов операции
     print('Готово!')
+    return bad_images
+
+
+# authors: Mikhail, Matvey
+if __name__ == "__main__":
+    bad_images = build_dataset()
     if len(bad_images) > 0:
         print('Не удалось обрезать:')
         [print(b, sep=', ', end='.\n') for b in bad_images]
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 
 from assistant import scrabble_assistant as sa
+from assistant.gaddag import build_gaddag_file
+from assistant.lexicon import build_words_file, get_words_path
 
 
 # author: Matvey
@@ -141,3 +143,36 @@ def prepare_frequency_dictionaries(path: str):
 
     for file in files:
         file.close()
+
+    # словари изменились - пересобираем их GADDAG и упакованные словари
+    prepare_gaddag_files([Path(file.name) for file in files])
+    prepare_word_tables([Path(file.name) for file in files])
+
+
+# author: Pavel
+def prepare_gaddag_files(paths: [Path]):
+    """
+    Компиляция текстовых словарей в GADDAG
+    Результат записывается рядом с каждым словарем в файл .gaddag,
+    который затем читается при старте вместо повторной компиляции
+    :param paths: пути до текстовых словарей
+    """
+
+    for path in paths:
+        gaddag = build_gaddag_file(path)
+        print(f'{path}: {gaddag.nodes_amount} узлов')
+
+
+# author: Pavel
+def prepare_word_tables(paths: [Path]):
+    """
+    Упаковка текстовых словарей в бинарный формат для чтения через mmap
+    Слова отсортированы по длине и первой букве, одна буква - один байт,
+    перед словами лежит таблица смещений групп.
+    Результат записывается рядом с каждым словарем в файл .words
+    :param paths: пути до текстовых словарей
+    """
+
+    for path in paths:
+        build_words_file(path)
+        print(f'{path}: {get_words_path(path).stat().st_size} байт')
@@ -1,16 +1,23 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import io
+import time
 from pathlib import Path
 
+import numpy as np
 from joblib import dump
 from skimage import img_as_bool, img_as_ubyte
 from skimage.io import imread
 from sklearn.decomposition import PCA
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
-from preprocessing.dataset import IMG_SIZE
+from ML.classifiers import BACKEND_HOG_SVM, BACKEND_MLP, \
+    BACKEND_PCA_KNN, BACKEND_PCA_LOGISTIC, BACKEND_RANDOM_FOREST, \
+    make_classifier
+from preprocessing.dataset import IMG_SIZE, LETTERS_CATEGORIES, \
+    read_packed_dataset
 
 # from sklearn.svm import SGDClassifier
 
@@ -18,13 +25,21 @@ DATASET_PATH = Path('ML/dataset')
 CLASSIFIER_DUMP_PATH = Path('ML/classifier.joblib')
 DIMRED_DUMP_PATH = Path('ML/decomposer.joblib')
 SCALER_DUMP_PATH = Path('ML/scaler.joblib')
+# классификатор для тренировки (см. ML/classifiers.py)
+CLASSIFIER_BACKEND = BACKEND_RANDOM_FOREST
+# True - при запуске скрипта вместо тренировки сравнить классификаторы
+IS_COMPARISON = False
+# классификаторы для сравнения (compare_classifiers)
+COMPARED_BACKENDS = [BACKEND_RANDOM_FOREST, BACKEND_PCA_LOGISTIC,
+                     BACKEND_PCA_KNN, BACKEND_HOG_SVM, BACKEND_MLP]
 
 
 # author: Matvey
 def prepare_model(dataset_path: Path = DATASET_PATH,
                   clf_dump_path: Path = CLASSIFIER_DUMP_PATH,
                   dimred_dump_path: Path = None,
-                  scaler_dump_path: Path = None):
+                  scaler_dump_path: Path = None,
+                  backend: str = CLASSIFIER_BACKEND):
     '''
     Запускаем один раз, для тренировки модели с последующим сохранением,
     для дальнейшего использования.
@@ -33,26 +48,16 @@ def prepare_model(dataset_path: Path = DATASET_PATH,
     :param clf_dump_path: путь до дампа классификатора
     :param dimred_dump_path: путь до дампа декомпозера
     :param scaler_dump_path: путь до дампа шкалировщика
+    :param backend: название классификатора (см. ML/classifiers.py)
     :return:
     '''
-    letters = []
-    flat_images = []
-
-    for folder in range(1, 34):
-        path_gen = Path(Path.cwd().parent / dataset_path / str(folder)).glob(
-            '*.jpg')  # Создаем генератор путей картинок
-        # Записываем пути картинок
-        paths = [path for path in path_gen if path.is_file()]
-        for i in range(len(paths)):
-            flat_images.append(
-                img_as_ubyte(img_as_bool(img_as_ubyte(
-                    imread(paths[i])).ravel())))
-
-            letters.append(folder)
-            # Картинка представляется IMG_SIZE * IMG_SIZE признаками (пикселями),
-            # в каждом из которых берем интенсивность белого
+    try:
+        flat_images, letters = load_packed_dataset(dataset_path)
+    except FileNotFoundError:
+        # датасет нарезан без упакованного формата
+        flat_images, letters = load_dataset_folders(dataset_path)
     print(
-        f'Модель учится на {len(paths)} изображениях с разрешением '
+        f'Модель учится на {len(letters)} изображениях с разрешением '
         f'{IMG_SIZE}x{IMG_SIZE} в 33 категориях.')
 
     if dimred_dump_path:
@@ -75,13 +80,122 @@ def prepare_model(dataset_path: Path = DATASET_PATH,
     # svm_clf = SVC(kernel='poly', degree=2, C=1, cache_size=1000)
     # svm_clf.fit(flat_images, letters)
 
-    rf_clf = RandomForestClassifier(n_estimators=750, random_state=1, n_jobs=-1,
-                                    verbose=True)
-    rf_clf.fit(flat_images, letters)
+    clf = make_classifier(backend)
+    clf.fit(flat_images, letters)
 
-    dump(rf_clf, Path.cwd().parent / clf_dump_path)
+    dump(clf, Path.cwd().parent / clf_dump_path)
     print(f'Модель обучена. Дамп модели сохранен в {clf_dump_path}')
 
 
+# author: Pavel
+def compare_classifiers(dataset_path: Path = DATASET_PATH,
+                        backends: [str] = COMPARED_BACKENDS,
+                        test_size: float = 0.2) -> dict:
+    """
+    Сравнение классификаторов на одном разбиении датасета:
+    точность на отложенной выборке, размер дампа и время распознавания
+    одной доски (predict_proba для 225 клеток, как в classify_images)
+    :param dataset_path: путь до датасета
+    :param backends: названия классификаторов
+    :param test_size: доля отложенной выборки
+    :return: словарь {классификатор: {accuracy, size, board_time,
+    fit_time}}
+    """
+
+    try:
+        flat_images, letters = load_packed_dataset(dataset_path)
+    except FileNotFoundError:
+        flat_images, letters = load_dataset_folders(dataset_path)
+    x_train, x_test, y_train, y_test = train_test_split(
+        np.array(flat_images), np.array(letters), test_size=test_size,
+        random_state=1, stratify=letters)
+    # одна "доска" - 225 клеток отложенной выборки
+    board = np.resize(x_test, (225, x_test.shape[1]))
+
+    results = {}
+    for backend in backends:
+        clf = make_classifier(backend)
+        if hasattr(clf, 'verbose'):
+            clf.verbose = False
+        start = time.perf_counter()
+        clf.fit(x_train, y_train)
+        fit_time = time.perf_counter() - start
+        accuracy = (clf.predict(x_test) == y_test).mean()
+
+        buffer = io.BytesIO()
+        dump(clf, buffer)
+
+        clf.predict_proba(board)  # первый вызов не учитывается
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            clf.predict_proba(board)
+            times.append(time.perf_counter() - start)
+
+        results[backend] = {'accuracy': accuracy,
+                            'size': buffer.getbuffer().nbytes,
+                            'board_time': float(np.median(times)),
+                            'fit_time': fit_time}
+
+    print(f'{"классификатор":<15}{"точность":>10}{"дамп, МБ":>10}'
+          f'{"доска, мс":>11}{"обучение, с":>13}')
+    for backend, result in results.items():
+        print(f'{backend:<15}{result["accuracy"]:>10.2%}'
+              f'{result["size"] / 2 ** 20:>10.2f}'
+              f'{result["board_time"] * 1000:>11.1f}'
+              f'{result["fit_time"]:>13.1f}')
+    return results
+
+
+# author: Pavel
+def load_packed_dataset(dataset_path: Path = DATASET_PATH) -> (np.ndarray,
+                                                               np.ndarray):
+    """
+    Загрузка упакованного датасета (см. preprocessing/dataset.py)
+    одним последовательным чтением вместо декодирования тысяч JPEG
+    Клетки переводятся в ЧБ так же, как при загрузке из папок
+    :param dataset_path: путь до датасета
+    :return: матрица признаков (N, IMG_SIZE * IMG_SIZE) uint8 и категории
+    """
+
+    cells, labels, _ = read_packed_dataset(dataset_path)
+    # только буквы, категории пустых клеток не используются
+    is_letter = np.isin(labels, LETTERS_CATEGORIES)
+    flat_images = cells[is_letter].reshape(-1, IMG_SIZE * IMG_SIZE)
+    # то же, что img_as_ubyte(img_as_bool(...))
+    flat_images = np.where(flat_images >= 128, 255, 0).astype(np.uint8)
+    return flat_images, labels[is_letter].astype(int)
+
+
+# author: Matvey
+def load_dataset_folders(dataset_path: Path = DATASET_PATH) -> ([np.ndarray],
+                                                                [int]):
+    """
+    Загрузка датасета из папок категорий с JPEG
+    :param dataset_path: путь до датасета
+    :return: массив развернутых картинок и категории
+    """
+    letters = []
+    flat_images = []
+
+    for folder in range(1, 34):
+        path_gen = Path(Path.cwd().parent / dataset_path / str(folder)).glob(
+            '*.jpg')  # Создаем генератор путей картинок
+        # Записываем пути картинок
+        paths = [path for path in path_gen if path.is_file()]
+        for i in range(len(paths)):
+            flat_images.append(
+                img_as_ubyte(img_as_bool(img_as_ubyte(
+                    imread(paths[i])).ravel())))
+
+            letters.append(folder)
+            # Картинка представляется IMG_SIZE * IMG_SIZE признаками (пикселями),
+            # в каждом из которых берем интенсивность белого
+    return flat_images, letters
+
+
 if __name__ == '__main__':
-    prepare_model()
+    if IS_COMPARISON:
+        compare_classifiers()
+    else:
+        prepare_model()